@@ -1,45 +1,127 @@
-from fastapi import Depends, HTTPException, status
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import os
+
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import SessionLocal, get_db
 from app.models import User
+from app.utils.cache import TTLCache
 from app.utils.security import decode_access_token
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Данные пользователя, достаточные для авторизации и ответа /me"""
+    id: int
+    role: str
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            role=user.role,
+            email=user.email,
+            full_name=user.full_name,
+            created_at=user.created_at
+        )
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    user_cache.delete(target.id)
+
+
+async def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    return decode_access_token(credentials.credentials)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Получение текущего пользователя из JWT токена"""
-    token = credentials.credentials
-    payload = decode_access_token(token) 
 
-    user_id: int = payload.get("sub") 
-    
-    user = db.query(User).filter(User.id == user_id).first()
+async def _load_principal(user_id: int, db: AsyncSession) -> Principal:
+    principal = user_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    user = await db.scalar(select(User).where(User.id == user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Пользователь не найден" 
+            detail="Пользователь не найден"
         )
-    
-    return user
+    principal = Principal.from_user(user)
+    user_cache.set(user_id, principal)
+    return principal
+
 
+async def _require_role(payload: dict, db: AsyncSession, role: str, detail: str) -> Principal:
+    user_id: int = payload.get("sub")
+    principal = user_cache.get(user_id)
+    if principal is None:
+        if payload.get("role") is not None:
+            # Роль подписана в токене - обращаться к БД не нужно
+            principal = Principal(id=user_id, role=payload["role"])
+        else:
+            principal = await _load_principal(user_id, db)
 
-async def get_current_teacher(current_user: User = Depends(get_current_user)) -> User:
-    if current_user.role != "teacher":
+    if principal.role != role:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Доступ только для преподавателей"
+            detail=detail
         )
-    return current_user
+    return principal
+
+
+async def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """Получение текущего пользователя из JWT токена"""
+    return await _load_principal(payload.get("sub"), db)
+
 
+async def get_current_teacher(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    return await _require_role(payload, db, "teacher", "Доступ только для преподавателей")
 
-async def get_current_student(current_user: User = Depends(get_current_user)) -> User:
-    if current_user.role != "student":
+
+async def get_current_student(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    return await _require_role(payload, db, "student", "Доступ только для студентов")
+
+
+async def get_stream_user(
+    token: Optional[str] = Query(None, description="JWT для EventSource, который не передает заголовки"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Principal:
+    """Пользователь для долгих потоков: токен из заголовка или ?token=.
+
+    Сессия БД открывается только на время загрузки пользователя, чтобы
+    открытый поток не удерживал соединение из пула.
+    """
+    if credentials is None and not token:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Доступ только для студентов"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-    return current_user
\ No newline at end of file
+    payload = decode_access_token(credentials.credentials if credentials else token)
+    async with SessionLocal() as db:
+        return await _load_principal(payload.get("sub"), db)
@@ -0,0 +1,88 @@
+"""Журнал изменений оценок и заданий для GET /api/sync.
+
+Обработчики записи в той же транзакции, что и сами данные, вызывают
+record(): у измененной записи старая строка журнала удаляется и вставляется
+новая, поэтому журнал хранит по одной строке на запись с номером (seq)
+последнего изменения. Удаление оставляет надгробие (deleted=true), чтобы
+клиент узнал о нем при следующей синхронизации.
+
+Надгробия старше SYNC_TOMBSTONE_TTL_DAYS удаляются командой
+
+    python -m app.cli compact
+
+Наибольший удаленный номер запоминается в счетчике COMPACTED: клиент, который
+синхронизировался раньше него, мог пропустить удаление и получает полный
+снимок вместо изменений.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Change, Counter, Grade
+from app.stats import CHUNK, NO_SYNC, bump_counter, get_counter
+
+SYNC_TOMBSTONE_TTL_DAYS = float(os.getenv("SYNC_TOMBSTONE_TTL_DAYS", "30"))
+
+GRADE = "grade"
+ASSIGNMENT = "assignment"
+
+COMPACTED = "changes:compacted"
+
+
+async def record(
+    db: AsyncSession, entity: str, rows: Iterable[Tuple[int, Optional[int]]], deleted: bool = False
+) -> None:
+    """Записи (id, student_id) изменены или удалены; новые номера получают в порядке rows"""
+    rows = list(rows)
+    now = datetime.now()
+    for start in range(0, len(rows), CHUNK):
+        chunk = rows[start:start + CHUNK]
+        ids = [entity_id for entity_id, _ in chunk]
+        await db.execute(
+            delete(Change).where(Change.entity == entity, Change.entity_id.in_(ids)), execution_options=NO_SYNC
+        )
+        await db.execute(insert(Change), [
+            {"entity": entity, "entity_id": entity_id, "student_id": student_id, "deleted": deleted, "changed_at": now}
+            for entity_id, student_id in chunk
+        ])
+
+
+async def assignment_grades_changed(db: AsyncSession, assignment_id: int) -> None:
+    """Задание изменилось: оценки по нему содержат его копию и тоже считаются измененными.
+
+    Два запроса независимо от числа оценок: DELETE и INSERT ... SELECT.
+    """
+    grades = select(Grade.id).where(Grade.assignment_id == assignment_id)
+    await db.execute(
+        delete(Change).where(Change.entity == GRADE, Change.entity_id.in_(grades)), execution_options=NO_SYNC
+    )
+    await db.execute(insert(Change).from_select(
+        ["entity", "entity_id", "student_id", "deleted", "changed_at"],
+        select(literal(GRADE), Grade.id, Grade.student_id, literal(False), literal(datetime.now()))
+        .where(Grade.assignment_id == assignment_id).order_by(Grade.id)
+    ))
+
+
+def head_statement():
+    """(последний номер, граница сжатия) одним запросом"""
+    return select(
+        select(func.max(Change.seq)).scalar_subquery(),
+        select(Counter.value).where(Counter.name == COMPACTED).scalar_subquery(),
+    )
+
+
+async def compact(db: AsyncSession, older_than: timedelta) -> int:
+    """Удаляет надгробия старше older_than; возвращает число удаленных строк"""
+    horizon = await db.scalar(
+        select(func.max(Change.seq)).where(Change.deleted == true(), Change.changed_at < datetime.now() - older_than)
+    )
+    if horizon is None:
+        return 0
+    result = await db.execute(
+        delete(Change).where(Change.deleted == true(), Change.seq <= horizon), execution_options=NO_SYNC
+    )
+    await bump_counter(db, COMPACTED, horizon - (await get_counter(db, COMPACTED) or 0))
+    return result.rowcount
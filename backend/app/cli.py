@@ -0,0 +1,57 @@
+"""Разовые команды обслуживания БД; выполняются перед запуском воркеров.
+
+    python -m app.cli migrate   # применить миграции Alembic до последней версии
+    python -m app.cli seed      # тестовые данные, если пользователей еще нет
+    python -m app.cli init      # migrate и seed
+    python -m app.cli compact   # удалить старые надгробия журнала изменений (app.changes)
+
+Приложение при импорте и старте к БД не обращается, поэтому несколько
+воркеров uvicorn/gunicorn не соревнуются за миграции одного файла SQLite,
+а старт воркера не тратит время на Alembic и bcrypt.
+"""
+import argparse
+import asyncio
+import sys
+from typing import Optional
+
+
+async def _run(command: str, days: Optional[float]) -> int:
+    from app.database import create_tables, engine, init_db
+
+    try:
+        if command == "compact":
+            await _compact(days)
+        if command in ("migrate", "init"):
+            await create_tables()
+            print("Миграции применены")
+        if command in ("seed", "init"):
+            await init_db()
+    finally:
+        await engine.dispose()
+    return 0
+
+
+async def _compact(days: Optional[float]) -> None:
+    from datetime import timedelta
+
+    from app import changes
+    from app.database import SessionLocal
+
+    async with SessionLocal() as db:
+        ttl = changes.SYNC_TOMBSTONE_TTL_DAYS if days is None else days
+        removed = await changes.compact(db, timedelta(days=ttl))
+        await db.commit()
+    print(f"Удалено надгробий: {removed}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Миграции, тестовые данные и обслуживание БД")
+    parser.add_argument("command", choices=["migrate", "seed", "init", "compact"])
+    parser.add_argument("--days", type=float, default=None,
+                        help="compact: возраст надгробий в днях (по умолчанию SYNC_TOMBSTONE_TTL_DAYS)")
+    args = parser.parse_args(argv)
+    return asyncio.run(_run(args.command, args.days))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""Привязка запросов к курсу.
+
+Задания относятся к курсу через assignments.course_id, студенты - через
+таблицу enrollments; оценки наследуют курс задания. Фильтры ниже строятся
+как подзапросы по индексированным колонкам (ix_assignments_course_id,
+первичный ключ enrollments), поэтому время списков и отчетов по курсу
+зависит от размера курса, а не всего журнала.
+"""
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Assignment, Course, Enrollment
+
+
+def assignment_ids(course_id: int):
+    return select(Assignment.id).where(Assignment.course_id == course_id)
+
+
+def student_ids(course_id: int):
+    return select(Enrollment.student_id).where(Enrollment.course_id == course_id)
+
+
+async def require_course(db: AsyncSession, course_id: Optional[int], principal) -> None:
+    """404 для несуществующего курса, 403 для студента, не записанного на него; один запрос"""
+    if course_id is None:
+        return
+    row = (await db.execute(
+        select(Course.id, Enrollment.student_id)
+        .outerjoin(Enrollment, and_(Enrollment.course_id == Course.id, Enrollment.student_id == principal.id))
+        .where(Course.id == course_id)
+    )).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Курс не найден"
+        )
+    if principal.role == "student" and row.student_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Вы не записаны на этот курс"
+        )
+
+
+async def total_assignments(db: AsyncSession, course_id: int) -> int:
+    return await db.scalar(select(func.count()).select_from(Assignment).where(Assignment.course_id == course_id))
@@ -1,42 +1,172 @@
-from sqlalchemy import create_engine
+from sqlalchemy import event, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 import os
 
 DATABASE_PATH = "./data/gradebook.db"
 
-os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
+# Реплика для отчетов; для SQLite по умолчанию - тот же файл в режиме только для чтения
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+}
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_pre_ping": True,
+}
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(POOL_OPTIONS["pool_size"])))
 
-Base = declarative_base()
+# Профиль SQLite: tuned - PRAGMA ниже на каждом соединении, off - настройки драйвера по умолчанию
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+}
+# Режим журнала хранится в файле БД и не может меняться соединением только для чтения
+WRITE_ONLY_PRAGMAS = ("journal_mode", "synchronous")
 
 
-def get_db():
-    db = SessionLocal()
+def async_database_url(url: str) -> str:
+    """sqlite:///... -> sqlite+aiosqlite:///..., postgresql://... -> postgresql+asyncpg://..."""
+    drivername = make_url(url).drivername
+    driver = ASYNC_DRIVERS.get(drivername)
+    if driver is None:
+        return url
+    # Меняется только схема: повторная сборка URL экранирует "file:" в пути SQLite
+    return driver + url[len(drivername):]
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def read_only_url(url: str):
+    """URL файла SQLite с mode=ro; None для БД в памяти и других СУБД"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    return f"{parsed.drivername}:///file:{os.path.abspath(parsed.database)}?mode=ro&uri=true"
+
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    cursor = dbapi_connection.cursor()
     try:
-        yield db
+        for name, value in SQLITE_PRAGMAS.items():
+            if read_only and name in WRITE_ONLY_PRAGMAS:
+                continue
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
     finally:
-        db.close()
+        cursor.close()
+
+
+def make_engine(url: str, read_only: bool = False, **options):
+    """Асинхронный движок с пулом соединений и профилем SQLite"""
+    pool_options = dict(POOL_OPTIONS, **options)
+    if is_sqlite(url) and make_url(url).database in (None, "", ":memory:"):
+        pool_options = {}
+    new_engine = create_async_engine(async_database_url(url), **pool_options)
+
+    if is_sqlite(url) and SQLITE_PROFILE == "tuned":
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection, read_only=read_only)
+
+    return new_engine
+
+
+engine = make_engine(DATABASE_URL)
+
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+if DATABASE_READ_URL:
+    read_engine = make_engine(DATABASE_READ_URL, read_only=True, pool_size=READ_POOL_SIZE)
+elif read_only_url(DATABASE_URL):
+    read_engine = make_engine(read_only_url(DATABASE_URL), read_only=True, pool_size=READ_POOL_SIZE)
+else:
+    read_engine = engine
+
+ReadSessionLocal = async_sessionmaker(read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
+
+
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
+
+
+async def get_read_db():
+    """Сессия для отчетов: отдельный пул соединений только для чтения"""
+    async with ReadSessionLocal() as db:
+        yield db
+
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+BASELINE_REVISION = "0001"
+# Таблицы исходной ревизии; БД без alembic_version помечается ею, только если все они есть
+BASELINE_TABLES = {"users", "assignments", "grades", "student_stats", "assignment_stats", "counters"}
+
+
+def _upgrade(connection) -> None:
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
+
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    tables = set(inspect(connection).get_table_names())
+    if BASELINE_TABLES <= tables and "alembic_version" not in tables:
+        # БД создана через create_all до появления миграций. Если каких-то таблиц нет
+        # (БД старше статистики), upgrade начинается с 0001 и создает только недостающие
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
+def ensure_database_directory(url: str = DATABASE_URL) -> None:
+    """Каталог файла SQLite; создается командой migrate, а не при импорте приложения"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:"):
+        os.makedirs(os.path.dirname(os.path.abspath(parsed.database.removeprefix("file:"))), exist_ok=True)
+
+
+async def create_tables():
+    """Применение миграций Alembic до последней версии"""
+    ensure_database_directory()
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade)
 
 
-def init_db():
+async def init_db():
     from app.models import User, Assignment, Grade
     from app.utils.security import get_password_hash
+    from app import stats
     from datetime import datetime, timedelta
     
     db = SessionLocal()
     
     try:
-        if db.query(User).first() is not None:
+        if (await db.execute(select(User.id).limit(1))).first() is not None:
+            if await stats.get_counter(db, stats.ASSIGNMENTS_COUNTER) is None:
+                await stats.rebuild(db)
+                await db.commit()
             return
+        # Пароль обоих студентов одинаковый - bcrypt считается один раз
+        student_password_hash = get_password_hash("student123")
         teacher = User(
             email="teacher@example.com",
             password_hash=get_password_hash("teacher123"),
@@ -46,20 +176,20 @@ def init_db():
         
         student1 = User(
             email="student1@example.com",
-            password_hash=get_password_hash("student123"),
+            password_hash=student_password_hash,
             full_name="Петров Петр Петрович",
             role="student"
         )
         
         student2 = User(
             email="student2@example.com",
-            password_hash=get_password_hash("student123"),
+            password_hash=student_password_hash,
             full_name="Сидорова Мария Владимировна",
             role="student"
         )
         
         db.add_all([teacher, student1, student2])
-        db.commit()
+        await db.commit()
         assignment1 = Assignment(
             title="Лабораторная работа №1",
             description="Основы программирования на Python",
@@ -77,7 +207,7 @@ def init_db():
         )
         
         db.add_all([assignment1, assignment2])
-        db.commit()
+        await db.commit()
         
         grade1 = Grade(
             assignment_id=assignment1.id,
@@ -96,12 +226,15 @@ def init_db():
         )
         
         db.add_all([grade1, grade2])
-        db.commit()
+        await db.flush()
+        await stats.rebuild(db)
+        await db.commit()
         
         print("✅ База данных инициализирована с тестовыми данными")
         
     except Exception as e:
         print(f"❌ Ошибка при инициализации БД: {e}")
-        db.rollback()
+        await db.rollback()
+        raise
     finally:
-        db.close()
\ No newline at end of file
+        await db.close()
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""Рассылка событий об оценках подписчикам потока /api/grades/stream.
+
+Брокер живет в процессе: обработчики записи публикуют событие после commit,
+и оно раскладывается по ограниченным очередям подписчиков. Студент получает
+только события о своих оценках, преподаватель - все. Последние события
+хранятся в кольцевом буфере, чтобы переподключившийся клиент с Last-Event-ID
+получил пропущенное без полной перезагрузки. Если нужного события в буфере
+уже нет (или процесс перезапустился), клиенту отправляется событие reset.
+
+Подписчик, не успевающий читать очередь, отключается; браузер переподключится
+с последним полученным id и догонит пропущенное из буфера.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+from app.utils import fast_json
+
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "1000"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "1000"))
+
+GRADE_CREATED = "grade.created"
+GRADE_UPDATED = "grade.updated"
+GRADE_DELETED = "grade.deleted"
+GRADES_CHANGED = "grades.changed"
+RESET = "reset"
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    type: str
+    data: dict
+    student_ids: frozenset
+
+    def encode(self) -> bytes:
+        return b"id: %s\nevent: %s\ndata: %s\n\n" % (
+            self.id.encode(), self.type.encode(), fast_json.dumps(self.data)
+        )
+
+
+@dataclass(eq=False)
+class Subscription:
+    user_id: int
+    role: str
+    queue: asyncio.Queue
+    closed: bool = field(default=False)
+
+    def wants(self, event: Event) -> bool:
+        return self.role == "teacher" or self.user_id in event.student_ids
+
+
+class EventBroker:
+    """Pub/sub в пределах процесса; вызывается из event loop приложения"""
+
+    def __init__(self, buffer_size: int = EVENTS_BUFFER_SIZE, queue_size: int = EVENTS_QUEUE_SIZE,
+                 max_subscribers: int = EVENTS_MAX_SUBSCRIBERS):
+        # Эпоха в id отличает события этого процесса от событий до перезапуска
+        self.epoch = format(time.time_ns(), "x")
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._seq = 0
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._subscribers: List[Subscription] = []
+        self.dropped = 0
+
+    def publish(self, type: str, data: dict, student_ids: Iterable[int]) -> Event:
+        self._seq += 1
+        event = Event(f"{self.epoch}-{self._seq}", type, data, frozenset(student_ids))
+        self._buffer.append((self._seq, event))
+        for subscription in list(self._subscribers):
+            if not subscription.wants(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+        return event
+
+    def subscribe(self, user_id: int, role: str) -> Optional[Subscription]:
+        """Новая подписка или None, если достигнут EVENTS_MAX_SUBSCRIBERS"""
+        if len(self._subscribers) >= self.max_subscribers:
+            return None
+        subscription = Subscription(user_id, role, asyncio.Queue(maxsize=self.queue_size))
+        self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.closed = True
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+
+    def replay(self, subscription: Subscription, last_event_id: str) -> Optional[List[Event]]:
+        """События после last_event_id для подписчика; None - восстановить нельзя"""
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self._seq:
+            return None
+        if seq < self._seq and (not self._buffer or self._buffer[0][0] > seq + 1):
+            # Часть событий уже вытеснена из буфера
+            return None
+        return [event for event_seq, event in self._buffer if event_seq > seq and subscription.wants(event)]
+
+    def reset_event(self) -> Event:
+        """Событие без сохранения в буфере: клиенту нужно перезагрузить данные"""
+        return Event(f"{self.epoch}-{self._seq}", RESET, {}, frozenset())
+
+    def close(self) -> None:
+        """Завершает все потоки (при остановке приложения)"""
+        for subscription in list(self._subscribers):
+            self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        self.dropped += 1
+        self.unsubscribe(subscription)
+        try:
+            # Разбудить ожидающий поток; если очередь полна, он увидит closed после ее разбора
+            subscription.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    async def stream(self, subscription: Subscription, backlog: Iterable[Event],
+                     heartbeat: float = EVENTS_HEARTBEAT):
+        """Тело ответа text/event-stream: пропущенные события, затем новые и heartbeat"""
+        try:
+            yield b"retry: 3000\n\n"
+            for event in backlog:
+                yield event.encode()
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    if subscription.closed:
+                        return
+                    yield b": ping\n\n"
+                    continue
+                if event is None:
+                    return
+                yield event.encode()
+                if subscription.closed and subscription.queue.empty():
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "buffered": len(self._buffer),
+            "last_seq": self._seq,
+            "dropped": self.dropped,
+        }
+
+
+broker = EventBroker()
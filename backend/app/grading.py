@@ -0,0 +1,125 @@
+"""Итоговые оценки: взвешенный процент, отбрасывание худших и буквенная шкала.
+
+Все оценки курса раскладываются в матрицу студенты x задания с долями
+score / max_score (NaN - оценки нет), после чего весь курс считается одним
+проходом операций над матрицей:
+
+- в категориях из GRADE_DROP_LOWEST (например, "quiz:1,lab:2") у каждого
+  студента не учитываются N худших оценок, но хотя бы одна остается;
+- процент - среднее долей, взвешенное Assignment.weight, по выставленным
+  оценкам (задания без оценки не снижают результат, как и average_score);
+- буква - по порогам GRADE_LETTERS (по умолчанию "A:90,B:80,C:70,D:60,F:0").
+"""
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def _parse_pairs(value: str) -> Dict[str, float]:
+    pairs = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, number = item.rpartition(":")
+        if not name:
+            raise ValueError(f"Ожидается пара имя:число, получено {item!r}")
+        pairs[name.strip()] = float(number)
+    return pairs
+
+
+@dataclass(frozen=True)
+class GradingPolicy:
+    # категория -> сколько худших оценок не учитывать
+    drop_lowest: Dict[str, int]
+    # (нижняя граница в процентах, буква) по возрастанию границы
+    letters: Tuple[Tuple[float, str], ...]
+
+    @classmethod
+    def from_env(cls) -> "GradingPolicy":
+        drop_lowest = {
+            name: int(count) for name, count in _parse_pairs(os.getenv("GRADE_DROP_LOWEST", "")).items()
+        }
+        letters = _parse_pairs(os.getenv("GRADE_LETTERS", "A:90,B:80,C:70,D:60,F:0"))
+        return cls(drop_lowest, tuple(sorted((bound, letter) for letter, bound in letters.items())))
+
+    def letter(self, percentage: np.ndarray) -> list:
+        bounds = np.array([bound for bound, _ in self.letters])
+        index = np.searchsorted(bounds, percentage, side="right") - 1
+        return [
+            self.letters[i][1] if not np.isnan(value) and i >= 0 else None
+            for i, value in zip(index.tolist(), percentage.tolist())
+        ]
+
+
+POLICY = GradingPolicy.from_env()
+
+
+@dataclass
+class FinalGrade:
+    percentage: Optional[float]
+    letter_grade: Optional[str]
+    category_percentages: Dict[str, float]
+
+
+def _weighted_percentage(matrix: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    graded = ~np.isnan(matrix)
+    total_weight = (graded * weights).sum(axis=1)
+    weighted = np.where(graded, matrix, 0.0) @ weights
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total_weight > 0, weighted / total_weight * 100, np.nan)
+
+
+def _drop_lowest(matrix: np.ndarray, count: int) -> None:
+    """На месте заменяет на NaN count худших оценок каждой строки, оставляя хотя бы одну"""
+    graded = (~np.isnan(matrix)).sum(axis=1)
+    drop = np.clip(np.minimum(count, graded - 1), 0, None)
+    # Ранг оценки в строке; оценок нет - в конец
+    order = np.argsort(np.where(np.isnan(matrix), np.inf, matrix), axis=1, kind="stable")
+    rank = np.argsort(order, axis=1)
+    matrix[rank < drop[:, None]] = np.nan
+
+
+def compute(
+    rows: Iterable[Tuple[int, int, float, float, float, Optional[str]]],
+    policy: GradingPolicy = POLICY
+) -> Dict[int, FinalGrade]:
+    """Итоги по студентам из строк (student_id, assignment_id, score, max_score, weight, category)"""
+    rows = list(rows)
+    if not rows:
+        return {}
+    student_ids, assignment_ids, scores, max_scores, weights, categories = zip(*rows)
+
+    students, row_index = np.unique(np.array(student_ids, dtype=np.int64), return_inverse=True)
+    assignments, first, column_index = np.unique(
+        np.array(assignment_ids, dtype=np.int64), return_index=True, return_inverse=True
+    )
+
+    column_weights = np.array(weights, dtype=np.float64)[first]
+    column_categories = np.array([categories[i] or "" for i in first.tolist()], dtype=object)
+
+    matrix = np.full((len(students), len(assignments)), np.nan)
+    matrix[row_index, column_index] = np.array(scores, dtype=np.float64) / np.array(max_scores, dtype=np.float64)
+
+    by_category = {}
+    for category in sorted(set(column_categories.tolist()) - {""}):
+        columns = column_categories == category
+        sub = matrix[:, columns]
+        if policy.drop_lowest.get(category):
+            _drop_lowest(sub, policy.drop_lowest[category])
+            matrix[:, columns] = sub
+        by_category[category] = _weighted_percentage(sub, column_weights[columns])
+
+    percentage = _weighted_percentage(matrix, column_weights)
+    letters = policy.letter(percentage)
+
+    return {
+        student_id: FinalGrade(
+            percentage=None if np.isnan(percentage[i]) else round(float(percentage[i]), 2),
+            letter_grade=letters[i],
+            category_percentages={
+                category: round(float(values[i]), 2)
+                for category, values in by_category.items() if not np.isnan(values[i])
+            }
+        )
+        for i, student_id in enumerate(students.tolist())
+    }
@@ -0,0 +1,457 @@
+"""Фоновые задания на построение отчетов в отдельных процессах.
+
+POST /api/reports/jobs ставит задание в очередь и сразу возвращает его id;
+отчет строится в пуле процессов (REPORT_JOB_WORKERS), поэтому не занимает
+event loop и соединения приложения. Готовый результат сохраняется файлом
+в REPORT_JOBS_DIR и отдается с ETag до истечения REPORT_JOBS_TTL.
+
+- Одинаковые задания (тип, параметры и версии данных из app.versions)
+  объединяются: пока данные не менялись, повторный запрос получает уже
+  поставленное или готовое задание.
+- Очередь ограничена REPORT_JOBS_QUEUE незавершенными заданиями.
+- Задание в очереди отменяется сразу; у выполняющегося результат
+  отбрасывается - процесс пула досчитывает его, но файл удаляется.
+
+Метаданные задания (статус, прогресс, ошибка) сохраняются манифестом
+{id}.meta.json рядом с результатом, поэтому статус, результат и удаление
+доступны из любого воркера uvicorn с общим REPORT_JOBS_DIR. Объединение
+одинаковых заданий и лимит очереди действуют в пределах воркера.
+"""
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+
+from app import versions
+
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+REPORT_JOBS_QUEUE = int(os.getenv("REPORT_JOBS_QUEUE", "16"))
+REPORT_JOBS_TTL = float(os.getenv("REPORT_JOBS_TTL", "3600"))
+REPORT_JOBS_DIR = os.getenv("REPORT_JOBS_DIR", "./data/reports")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+PENDING = (QUEUED, RUNNING)
+
+JOB_ID = re.compile("[0-9a-f]{32}")
+
+# тип задания -> версии данных, от которых зависит результат
+DEPENDENCIES = {
+    "course_report": [versions.GRADES, versions.ASSIGNMENTS, versions.USERS, versions.COURSES],
+    "student_report": [versions.GRADES, versions.ASSIGNMENTS, versions.USERS, versions.COURSES],
+    "export": [versions.GRADES, versions.ASSIGNMENTS, versions.USERS, versions.COURSES],
+}
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class JobError(Exception):
+    """Ошибка построения отчета с сообщением для клиента"""
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass(eq=False)
+class Job:
+    id: str
+    kind: str
+    params: dict
+    key: tuple
+    extension: str
+    status: str = QUEUED
+    progress: float = 0.0
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires: float = float("inf")
+    task: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(REPORT_JOBS_DIR, f"{self.id}.{self.extension}")
+
+    @property
+    def manifest(self) -> str:
+        return _manifest_path(self.id)
+
+    @property
+    def filename(self) -> str:
+        name = self.kind if self.kind != "export" else export_name(self.params["layout"], self.params.get("course_id"))
+        return f"{name}_{self.created_at.date().isoformat()}.{self.extension}"
+
+
+def export_name(layout: str, course_id: Optional[int] = None) -> str:
+    """Имя файла выгрузки без даты и расширения"""
+    return f"course_report_{layout}" if course_id is None else f"course_{course_id}_report_{layout}"
+
+
+class JobQueue:
+    """Реестр заданий и диспетчер: в пул передается не больше заданий, чем в нем процессов,
+    поэтому ожидающие остаются в очереди приложения и отменяются без участия пула"""
+
+    def __init__(self, workers: int = REPORT_JOB_WORKERS, limit: int = REPORT_JOBS_QUEUE,
+                 ttl: float = REPORT_JOBS_TTL):
+        self.workers = workers
+        self.limit = limit
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[tuple, Job] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._progress = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Статус меняется в event loop, прогресс - в потоке _drain_progress; манифест пишется под блокировкой
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        # spawn: дочерний процесс не наследует открытые соединения и потоки aiosqlite
+        self._progress = multiprocessing.get_context("spawn").Queue()
+        self._pool = self._make_pool()
+        self._slots = asyncio.Semaphore(self.workers)
+        threading.Thread(target=self._drain_progress, args=(self._progress,), daemon=True).start()
+        os.makedirs(REPORT_JOBS_DIR, exist_ok=True)
+        _remove_stale_files(self.ttl)
+
+    def _make_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(self._progress,)
+        )
+
+    def _drain_progress(self, progress) -> None:
+        while True:
+            message = progress.get()
+            if message is None:
+                return
+            job = self._jobs.get(message[0])
+            with self._lock:
+                if job is not None and job.status == RUNNING:
+                    job.progress = message[1]
+                    _save(job)
+
+    def submit(self, kind: str, params: dict, extension: str, data_versions: tuple) -> Job:
+        """Новое задание или уже существующее с теми же параметрами и версиями данных"""
+        self.sweep()
+        key = (kind, tuple(sorted(params.items())), data_versions)
+        existing = self._by_key.get(key)
+        if existing is not None and existing.status in PENDING + (DONE,):
+            return existing
+        if sum(job.status in PENDING for job in self._jobs.values()) >= self.limit:
+            raise QueueFull()
+        if self._pool is None:
+            self._start()
+
+        job = Job(uuid.uuid4().hex, kind, params, key, extension)
+        self._save(job)
+        self._jobs[job.id] = job
+        self._by_key[key] = job
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    async def _run(self, job: Job) -> None:
+        try:
+            async with self._slots:
+                self._sync(job)
+                if job.status == CANCELLED:
+                    return
+                job.status, job.started_at = RUNNING, datetime.now()
+                self._save(job)
+                pool = self._pool
+                await asyncio.get_running_loop().run_in_executor(
+                    pool, execute, job.id, job.kind, job.params, job.path
+                )
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED)
+            return
+        except JobError as e:
+            self._finish(job, FAILED, str(e))
+            return
+        except BrokenProcessPool:
+            # Процесс пула аварийно завершился (например, по нехватке памяти) - следующим заданиям новый пул
+            if self._pool is pool:
+                self._pool = self._make_pool()
+            self._finish(job, FAILED, "Процесс построения отчета аварийно завершился")
+            return
+        except Exception as e:
+            self._finish(job, FAILED, f"Ошибка построения отчета: {type(e).__name__}")
+            return
+        self._sync(job)
+        if job.status == CANCELLED:
+            _unlink(job.path)
+            return
+        job.progress = 1.0
+        self._finish(job, DONE)
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            if job.status == CANCELLED:
+                return
+            job.status, job.error, job.finished_at = status, error, datetime.now()
+            job.expires = time.time() + self.ttl
+            _save(job)
+
+    def _save(self, job: Job) -> None:
+        with self._lock:
+            _save(job)
+
+    def _sync(self, job: Job) -> None:
+        """Отмена из другого воркера видна только в манифесте"""
+        stored = _load(job.id)
+        if stored is not None and stored.status == CANCELLED and job.status in PENDING:
+            job.status, job.finished_at, job.expires = CANCELLED, stored.finished_at, stored.expires
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Задание этого воркера или, по манифесту, принятое другим"""
+        self.sweep()
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = _load(job_id)
+            if job is not None and job.expires <= time.time():
+                _discard(job)
+                return None
+            return job
+        if job.status in PENDING:
+            self._sync(job)
+        elif not os.path.exists(job.manifest):
+            # Удалено через другой воркер
+            self._forget(job)
+            return None
+        return job
+
+    def cancel(self, job: Job) -> None:
+        if job.status not in PENDING:
+            return
+        queued = job.status == QUEUED
+        self._finish(job, CANCELLED)
+        # У задания другого воркера task нет: он увидит отмену в манифесте
+        if queued and job.task is not None:
+            job.task.cancel()
+
+    def remove(self, job: Job) -> None:
+        """Удаляет завершенное задание вместе с файлом результата"""
+        job.expires = 0
+        if self._jobs.get(job.id) is not job:
+            _discard(job)
+        self.sweep()
+
+    def sweep(self) -> None:
+        """Удаляет задания и файлы с истекшим REPORT_JOBS_TTL"""
+        now = time.time()
+        for job in [job for job in self._jobs.values() if job.expires <= now]:
+            self._forget(job)
+            _discard(job)
+
+    def _forget(self, job: Job) -> None:
+        del self._jobs[job.id]
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+
+    def shutdown(self) -> None:
+        for job in self._jobs.values():
+            if job.status == QUEUED:
+                job.task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._progress.put(None)
+            self._pool = None
+
+    def stats(self) -> dict:
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.workers, "limit": self.limit, **counts}
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _manifest_path(job_id: str) -> str:
+    return os.path.join(REPORT_JOBS_DIR, f"{job_id}.meta.json")
+
+
+def _save(job: Job) -> None:
+    """Атомарно записывает манифест: читатель в другом воркере не увидит половину файла"""
+    manifest = {
+        "id": job.id,
+        "kind": job.kind,
+        "params": job.params,
+        "extension": job.extension,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "expires": job.expires if job.expires != float("inf") else None,
+    }
+    os.makedirs(REPORT_JOBS_DIR, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=REPORT_JOBS_DIR, suffix=".partial")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(partial, job.manifest)
+    finally:
+        _unlink(partial)
+
+
+def _load(job_id: str) -> Optional[Job]:
+    # id приходит из URL: только формат uuid4().hex, чтобы не выйти за пределы REPORT_JOBS_DIR
+    if not JOB_ID.fullmatch(job_id):
+        return None
+    try:
+        with open(_manifest_path(job_id), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return Job(
+        manifest["id"], manifest["kind"], manifest["params"], (), manifest["extension"],
+        status=manifest["status"],
+        progress=manifest["progress"],
+        error=manifest["error"],
+        created_at=datetime.fromisoformat(manifest["created_at"]),
+        started_at=datetime.fromisoformat(manifest["started_at"]) if manifest["started_at"] else None,
+        finished_at=datetime.fromisoformat(manifest["finished_at"]) if manifest["finished_at"] else None,
+        expires=manifest["expires"] if manifest["expires"] is not None else float("inf"),
+    )
+
+
+def _discard(job: Job) -> None:
+    _unlink(job.path)
+    _unlink(job.manifest)
+
+
+def _remove_stale_files(ttl: float) -> None:
+    """Файлы и манифесты, оставшиеся от прошлых запусков"""
+    deadline = time.time() - ttl
+    for entry in os.scandir(REPORT_JOBS_DIR):
+        if entry.is_file() and entry.stat().st_mtime < deadline:
+            _unlink(entry.path)
+
+
+# --- Код ниже выполняется в процессах пула ---
+
+_progress_queue = None
+
+
+def _init_worker(progress) -> None:
+    global _progress_queue
+    _progress_queue = progress
+
+
+def _report_progress(job_id: str, value: float) -> None:
+    if _progress_queue is not None:
+        _progress_queue.put((job_id, round(value, 3)))
+
+
+def execute(job_id: str, kind: str, params: dict, path: str) -> None:
+    """Строит отчет и атомарно записывает его в path"""
+    partial = f"{path}.partial"
+    try:
+        asyncio.run(_build(job_id, kind, params, partial))
+        os.replace(partial, path)
+    finally:
+        _unlink(partial)
+
+
+async def _build(job_id: str, kind: str, params: dict, path: str) -> None:
+    from fastapi import HTTPException
+
+    from app import database
+    from app.database import make_engine
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    # Свой движок на каждое задание: соединения пула привязаны к event loop
+    engine = make_engine(
+        database.read_engine.url.render_as_string(hide_password=False),
+        read_only=database.read_engine is not database.engine,
+        pool_size=1
+    )
+    try:
+        async with AsyncSession(engine) as db:
+            if kind == "export":
+                await _write_export(db, job_id, params["format"], params["layout"], path, params.get("course_id"))
+            else:
+                await _write_report(db, kind, params, path)
+    except HTTPException as e:
+        raise JobError(e.detail)
+    finally:
+        await engine.dispose()
+
+
+async def _write_report(db, kind: str, params: dict, path: str) -> None:
+    from app.routers import reports
+    from app.utils import fast_json
+
+    if kind == "course_report":
+        report = await reports._build_course_report(db, True, params.get("course_id"))
+    else:
+        report = await reports._build_student_report(db, params["student_id"], True, params.get("course_id"))
+    with open(path, "wb") as f:
+        f.write(fast_json.dumps(report))
+
+
+async def _write_export(db, job_id: str, format: str, layout: str, path: str, course_id: Optional[int] = None) -> None:
+    from sqlalchemy import func, select
+
+    from app.models import Grade, User
+    from app.routers import reports
+
+    if layout == "grades":
+        total = await db.scalar(
+            select(func.count(Grade.id)).join(User, User.id == Grade.student_id)
+            .where(*reports._course_students(course_id), *reports._course_grades(course_id))
+        )
+    else:
+        total = await db.scalar(select(func.count(User.id)).where(*reports._course_students(course_id)))
+    written = 0
+
+    if format == "xlsx":
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise JobError("Для выгрузки в XLSX требуется пакет openpyxl")
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title="Отчет")
+        async for batch in reports._export_batches(db, layout, course_id):
+            for row in batch:
+                sheet.append(row)
+            written += len(batch)
+            _report_progress(job_id, min(written / (total + 1), 1.0))
+        workbook.save(path)
+        return
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("\ufeff")
+        writer = csv.writer(f)
+        async for batch in reports._export_batches(db, layout, course_id):
+            writer.writerows(batch)
+            written += len(batch)
+            # +1 - строка заголовка
+            _report_progress(job_id, min(written / (total + 1), 1.0))
+
+
+queue = JobQueue()
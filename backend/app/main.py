@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base, init_db
-from app.routers import auth, users, assignments, grades, reports
-
-Base.metadata.create_all(bind=engine)
+from fastapi.responses import PlainTextResponse
+from app.database import engine, read_engine
+from app import events, jobs, metrics, ratelimit
+from app.routers import auth, users, courses, assignments, grades, reports, sync
+from app.auth import user_cache
+from app.utils.response_cache import report_cache
 
 app = FastAPI(
     title="Academic Gradebook API",
@@ -11,24 +13,40 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Добавлен раньше CORS, поэтому выполняется внутри него: отказы 429/503 тоже получают CORS-заголовки
+if ratelimit.RATE_LIMIT_ENABLED:
+    app.add_middleware(ratelimit.RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://frontend:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "Link", "X-Next-Cursor", "ETag", "Last-Modified", "Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining"
+    ],
 )
 
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine.sync_engine)
+    metrics.instrument_engine(read_engine.sync_engine)
+
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
+app.include_router(courses.router, prefix="/api/courses", tags=["Courses"])
 app.include_router(assignments.router, prefix="/api/assignments", tags=["Assignments"])
 app.include_router(grades.router, prefix="/api/grades", tags=["Grades"])
 app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
 
 
-@app.on_event("startup")
-async def startup_event():
-    init_db()
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Завершить открытые потоки событий, чтобы клиенты переподключились к новому процессу
+    events.broker.close()
+    jobs.queue.shutdown()
 
 
 @app.get("/")
@@ -42,4 +60,17 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "auth_cache": user_cache.stats(),
+        "report_cache": report_cache.stats(),
+        "events": events.broker.stats(),
+        "rate_limit": ratelimit.stats(),
+        "report_jobs": jobs.queue.stats()
+    }
+
+
+if metrics.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
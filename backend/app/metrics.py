@@ -0,0 +1,233 @@
+"""Метрики запросов и SQL в формате Prometheus.
+
+MetricsMiddleware измеряет время ответа по шаблону маршрута, а обработчики
+событий SQLAlchemy считают запросы к БД и их время для текущего HTTP-запроса
+(через contextvar). Медленные запросы пишутся в лог без значений параметров.
+При METRICS_ENABLED=false middleware и обработчики не подключаются.
+"""
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+logger = logging.getLogger("app.metrics")
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами и метками"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # счетчики по границам, сумма, общее число
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(_sample(
+                        f"{self.name}_bucket", self.labels + ("le",), label_values + (bound,), bucket_count
+                    ))
+                lines.append(_sample(f"{self.name}_bucket", self.labels + ("le",), label_values + ("+Inf",), count))
+                lines.append(_sample(f"{self.name}_sum", self.labels, label_values, total))
+                lines.append(_sample(f"{self.name}_count", self.labels, label_values, count))
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = self._values or ({} if self.labels else {(): 0})
+            for label_values, value in sorted(values.items()):
+                lines.append(_sample(self.name, self.labels, label_values, value))
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, label_names: Sequence[str], label_values: Sequence, value) -> str:
+    if not label_names:
+        return f"{name} {value}"
+    labels = ",".join(f'{label}="{_escape(v)}"' for label, v in zip(label_names, label_values))
+    return f"{name}{{{labels}}} {value}"
+
+
+http_requests = Counter("http_requests_total", "Число HTTP-запросов", ("method", "route", "status"))
+http_duration = Histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса", ("method", "route"), LATENCY_BUCKETS
+)
+http_sql_statements = Histogram(
+    "http_request_sql_statements", "Число SQL-запросов на HTTP-запрос", ("method", "route"), COUNT_BUCKETS
+)
+http_db_duration = Histogram(
+    "http_request_db_seconds", "Суммарное время SQL на HTTP-запрос", ("method", "route"), LATENCY_BUCKETS
+)
+db_slow_queries = Counter("db_slow_queries_total", "Число SQL-запросов дольше SLOW_QUERY_MS")
+password_hash_duration = Histogram(
+    "password_hash_seconds", "Время bcrypt в пуле потоков", ("operation",), LATENCY_BUCKETS
+)
+http_rejected = Counter(
+    "http_rejected_total", "Запросы, отклоненные лимитом частоты или перегрузкой", ("reason",)
+)
+
+REGISTRY = [http_requests, http_duration, http_sql_statements, http_db_duration, db_slow_queries,
+            password_hash_duration, http_rejected]
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def observe_password_hash(operation: str, seconds: float) -> None:
+    if METRICS_ENABLED:
+        password_hash_duration.observe(seconds, operation)
+
+
+def observe_rejected(reason: str) -> None:
+    if METRICS_ENABLED:
+        http_rejected.inc(reason)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        db_slow_queries.inc()
+        # Только текст с плейсхолдерами: значения параметров могут содержать персональные данные
+        logger.warning(
+            "Медленный запрос %.1f мс (%s): %s",
+            elapsed * 1000,
+            "executemany" if executemany else f"параметров: {len(parameters) if parameters else 0}",
+            " ".join(statement.split())
+        )
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Подключает обработчики SQL-событий к синхронному движку"""
+    if not METRICS_ENABLED or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _route_template(scope) -> str:
+    """Шаблон маршрута (/api/grades/{grade_id}), а не путь - чтобы не плодить серии.
+
+    Маршруты подключенных роутеров могут хранить путь без префикса; префикс
+    восстанавливается из фактического пути запроса.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    try:
+        rendered = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    if rendered != path and path.endswith(rendered):
+        return path[:len(path) - len(rendered)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """Чистый ASGI middleware: без BaseHTTPMiddleware и лишних задач на запрос"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = _route_template(scope)
+            method = scope["method"]
+            http_requests.inc(method, route, str(status_code))
+            http_duration.observe(elapsed, method, route)
+            http_sql_statements.observe(stats.statements, method, route)
+            http_db_duration.observe(stats.db_seconds, method, route)
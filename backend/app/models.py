@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Boolean, Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -17,7 +17,7 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
     full_name = Column(String, nullable=False)
-    role = Column(String, nullable=False)  
+    role = Column(String, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.now)
     
     created_assignments = relationship("Assignment", back_populates="teacher", foreign_keys="Assignment.created_by")
@@ -32,15 +32,55 @@ class Assignment(Base):
     description = Column(Text)
     max_score = Column(Float, nullable=False)
     deadline = Column(DateTime)
+    # Вес в итоговой оценке и категория для политик вроде "не учитывать худшие N" (app.grading)
+    weight = Column(Float, nullable=False, default=1.0, server_default="1")
+    category = Column(String)
+    # Задание без курса относится ко всему журналу (данные до появления курсов)
+    course_id = Column(Integer, ForeignKey("courses.id"), index=True)
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.now)
     
     teacher = relationship("User", back_populates="created_assignments", foreign_keys=[created_by])
+    course = relationship("Course", back_populates="assignments")
     grades = relationship("Grade", back_populates="assignment", cascade="all, delete-orphan")
 
 
+class Course(Base):
+    __tablename__ = "courses"
+
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String, nullable=False)
+    term = Column(String, index=True)
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.now)
+
+    assignments = relationship("Assignment", back_populates="course")
+    enrollments = relationship("Enrollment", back_populates="course", cascade="all, delete-orphan")
+
+
+class Enrollment(Base):
+    __tablename__ = "enrollments"
+    __table_args__ = (
+        # Курсы студента; поиск студентов курса обслуживает первичный ключ
+        Index("ix_enrollments_student", "student_id", "course_id"),
+    )
+
+    course_id = Column(Integer, ForeignKey("courses.id"), primary_key=True)
+    student_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    enrolled_at = Column(DateTime, default=datetime.now)
+
+    course = relationship("Course", back_populates="enrollments")
+
+
 class Grade(Base):
     __tablename__ = "grades"
+    __table_args__ = (
+        # Одна оценка на студента по заданию; индекс также обслуживает фильтр по assignment_id
+        Index("ux_grades_assignment_student", "assignment_id", "student_id", unique=True),
+        # Покрывающие индексы для агрегатов статистики (count/sum/min/max по score)
+        Index("ix_grades_student_score", "student_id", "score"),
+        Index("ix_grades_assignment_score", "assignment_id", "score"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     assignment_id = Column(Integer, ForeignKey("assignments.id"), nullable=False)
@@ -51,4 +91,50 @@ class Grade(Base):
     graded_at = Column(DateTime)
     
     assignment = relationship("Assignment", back_populates="grades")
-    student = relationship("User", back_populates="grades")
\ No newline at end of file
+    student = relationship("User", back_populates="grades")
+
+class StudentStats(Base):
+    __tablename__ = "student_stats"
+
+    student_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    grade_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    score_min = Column(Float)
+    score_max = Column(Float)
+
+
+class AssignmentStats(Base):
+    __tablename__ = "assignment_stats"
+
+    assignment_id = Column(Integer, ForeignKey("assignments.id"), primary_key=True)
+    grade_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    score_sq_sum = Column(Float, nullable=False, default=0)
+
+
+class Counter(Base):
+    __tablename__ = "counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class Change(Base):
+    """Журнал изменений для GET /api/sync: по одной строке на запись с номером последнего изменения"""
+    __tablename__ = "changes"
+    __table_args__ = (
+        Index("ux_changes_entity", "entity", "entity_id", unique=True),
+        # Изменения, видимые студенту: его оценки после since
+        Index("ix_changes_student_seq", "student_id", "seq"),
+        # AUTOINCREMENT: номера удаленных строк не выдаются повторно
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    # Для оценок - студент, которому видна запись (сохраняется и в надгробии)
+    student_id = Column(Integer)
+    deleted = Column(Boolean, nullable=False, default=False)
+    changed_at = Column(DateTime, nullable=False, default=datetime.now)
@@ -0,0 +1,229 @@
+"""Ограничение частоты запросов и допуск к тяжелым эндпоинтам.
+
+RateLimitMiddleware - чистый ASGI middleware перед маршрутизацией:
+
+- у каждого клиента есть token bucket на RATE_LIMIT_BURST токенов, которые
+  пополняются со скоростью RATE_LIMIT_RATE в секунду. Ключ - sub из JWT
+  (подпись проверяется, БД не нужна); без токена, в том числе на
+  /api/auth/login, - IP клиента;
+- запрос списывает столько токенов, сколько стоит маршрут (ROUTE_COSTS):
+  отчеты и маршруты с bcrypt дороже обычных чтений;
+- тяжелые маршруты дополнительно проходят через общий предел одновременных
+  запросов HEAVY_CONCURRENCY. Не поместившиеся ждут в очереди до
+  HEAVY_QUEUE_TIMEOUT секунд; при полной очереди или по таймауту - 503.
+
+Ответ содержит X-RateLimit-Limit и X-RateLimit-Remaining, отказ 429/503 -
+еще и Retry-After. Состояние корзин хранится в RateLimitStore: по умолчанию
+в памяти процесса (у каждого воркера свои корзины); для общего лимита
+нескольких воркеров достаточно реализовать take() поверх общего хранилища.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app import metrics
+from app.utils import fast_json
+from app.utils.security import decode_access_token
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "10"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "60"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+HEAVY_CONCURRENCY = int(os.getenv("HEAVY_CONCURRENCY", "4"))
+HEAVY_QUEUE = int(os.getenv("HEAVY_QUEUE", "16"))
+HEAVY_QUEUE_TIMEOUT = float(os.getenv("HEAVY_QUEUE_TIMEOUT", "10"))
+
+# (метод, префикс пути, стоимость в токенах, тяжелый); первое совпадение, иначе DEFAULT_COST
+ROUTE_COSTS = (
+    ("POST", "/api/auth/login", 10, False),
+    ("POST", "/api/auth/register", 10, False),
+    # Опрос статуса фоновых заданий дешев; сама постановка стоит как отчет, но выполняется вне запроса
+    ("GET", "/api/reports/jobs", 1, False),
+    ("POST", "/api/reports/jobs", 5, False),
+    ("GET", "/api/reports/", 5, True),
+    ("POST", "/api/grades/bulk", 5, True),
+    ("GET", "/api/grades/matrix", 3, False),
+)
+DEFAULT_COST = 1
+
+# Служебные пути не лимитируются
+EXEMPT_PATHS = ("/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+class RateLimitStore:
+    """Интерфейс хранилища корзин: атомарно списать cost токенов по ключу"""
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> Decision:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryStore(RateLimitStore):
+    """Корзины в памяти процесса; давно не использованные вытесняются по LRU"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        # ключ -> (токены, время последнего пополнения)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> Decision:
+        now = self.clock()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return Decision(allowed, tokens, retry_after)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "keys": len(self._buckets)}
+
+
+class AdmissionGate:
+    """Предел одновременных тяжелых запросов с ограниченной очередью ожидания"""
+
+    def __init__(self, limit: int = HEAVY_CONCURRENCY, queue: int = HEAVY_QUEUE,
+                 timeout: float = HEAVY_QUEUE_TIMEOUT):
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> bool:
+        """True - можно выполнять; False - очередь полна или ожидание истекло"""
+        if self.active >= self.limit and self.waiting >= self.queue:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {"active": self.active, "waiting": self.waiting, "limit": self.limit}
+
+
+def route_cost(method: str, path: str) -> Tuple[float, bool]:
+    for route_method, prefix, cost, heavy in ROUTE_COSTS:
+        if method == route_method and path.startswith(prefix):
+            return cost, heavy
+    return DEFAULT_COST, False
+
+
+def _token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.decode("latin-1").partition(" ")
+            return credentials if scheme.lower() == "bearer" else None
+    # Поток событий передает токен в query-параметре (EventSource не умеет заголовки)
+    for item in scope.get("query_string", b"").decode("latin-1").split("&"):
+        name, _, value = item.partition("=")
+        if name == "token" and value:
+            return value
+    return None
+
+
+def client_key(scope) -> str:
+    """user:<sub> для запросов с действительным токеном, иначе ip:<адрес>"""
+    token = _token(scope)
+    if token:
+        try:
+            return f"user:{decode_access_token(token)['sub']}"
+        except Exception:
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, store: Optional[RateLimitStore] = None, gate: Optional[AdmissionGate] = None,
+                 rate: float = RATE_LIMIT_RATE, burst: float = RATE_LIMIT_BURST):
+        self.app = app
+        self.store = store or limiter_store
+        self.gate = gate or heavy_gate
+        self.rate = rate
+        self.burst = burst
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        cost, heavy = route_cost(scope["method"], scope["path"])
+        decision = await self.store.take(client_key(scope), min(cost, self.burst), self.rate, self.burst)
+        headers = [
+            (b"x-ratelimit-limit", str(int(self.burst)).encode()),
+            (b"x-ratelimit-remaining", str(int(decision.remaining)).encode()),
+        ]
+        if not decision.allowed:
+            metrics.observe_rejected("rate_limit")
+            await _reject(send, 429, "Слишком много запросов, повторите попытку позже",
+                          decision.retry_after, headers)
+            return
+
+        if heavy:
+            if not await self.gate.acquire():
+                metrics.observe_rejected("overload")
+                await _reject(send, 503, "Сервер перегружен, повторите попытку позже", 1, headers)
+                return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if heavy:
+                self.gate.release()
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float, headers: list) -> None:
+    body = fast_json.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": headers + [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+limiter_store = MemoryStore()
+heavy_gate = AdmissionGate()
+
+
+def stats() -> dict:
+    return {"enabled": RATE_LIMIT_ENABLED, "store": limiter_store.stats(), "heavy": heavy_gate.stats()}
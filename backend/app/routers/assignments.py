@@ -1,30 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.database import get_db
-from app.models import Assignment, User
+from app.models import Assignment, Course, Grade, User
 from app.schemas import AssignmentCreate, Assignment as AssignmentSchema, AssignmentUpdate, AssignmentWithTeacher
 from app.auth import get_current_user, get_current_teacher
+from app.utils.loading import loader_options
+from app.utils.pagination import MAX_PAGE_SIZE, paginate, parse_fields, projected_response
+from app.utils import fast_json
+from app.utils.fast_json import fast_response, row_projection
+from app.utils.http_cache import conditional_get
+from app import changes, events, stats, versions
+from app.courses import require_course
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[AssignmentWithTeacher])
 async def get_assignments(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = None,
+    fields: Optional[str] = None,
+    course_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    assignments = db.query(Assignment).all()
+    columns = parse_fields(fields, Assignment, AssignmentWithTeacher)
+    await require_course(db, course_id, current_user)
+    not_modified = await conditional_get(request, response, db, [versions.ASSIGNMENTS, versions.USERS])
+    if not_modified:
+        return not_modified
+
+    fast = not columns and fast_json.FAST_JSON
+    if columns:
+        stmt = select(*[getattr(Assignment, name) for name in columns])
+    elif fast:
+        projection = row_projection(Assignment, AssignmentWithTeacher)
+        stmt = projection.select()
+    else:
+        stmt = select(Assignment).options(*loader_options(Assignment, AssignmentWithTeacher))
+    if course_id is not None:
+        stmt = stmt.where(Assignment.course_id == course_id)
+    assignments = await paginate(
+        db, stmt, Assignment.id, request, response, limit, after, rows=bool(columns) or fast
+    )
+    if columns:
+        return projected_response(assignments, response)
+    if fast:
+        return fast_response([projection.build(row) for row in assignments], response)
     return assignments
 
 
 @router.get("/{assignment_id}", response_model=AssignmentWithTeacher)
 async def get_assignment(
     assignment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    assignment = await db.scalar(
+        select(Assignment).options(
+            *loader_options(Assignment, AssignmentWithTeacher)
+        ).where(Assignment.id == assignment_id)
+    )
     if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -36,17 +76,22 @@ async def get_assignment(
 @router.post("/", response_model=AssignmentSchema, status_code=status.HTTP_201_CREATED)
 async def create_assignment(
     assignment_data: AssignmentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_teacher: User = Depends(get_current_teacher)
 ):
+    await _check_course(db, assignment_data.course_id)
     new_assignment = Assignment(
         **assignment_data.dict(),
         created_by=current_teacher.id
     )
     
     db.add(new_assignment)
-    db.commit()
-    db.refresh(new_assignment)
+    await db.flush()
+    await stats.assignment_added(db)
+    await versions.bump(db, versions.ASSIGNMENTS)
+    await changes.record(db, changes.ASSIGNMENT, [(new_assignment.id, None)])
+    await db.commit()
+    await db.refresh(new_assignment)
     
     return new_assignment
 
@@ -55,10 +100,10 @@ async def create_assignment(
 async def update_assignment(
     assignment_id: int,
     assignment_data: AssignmentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_teacher: User = Depends(get_current_teacher)
 ):
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    assignment = await db.get(Assignment, assignment_id)
     
     if not assignment:
         raise HTTPException(
@@ -72,11 +117,16 @@ async def update_assignment(
             detail="Вы можете редактировать только свои задания"
         )
     
+    if "course_id" in assignment_data.model_fields_set:
+        await _check_course(db, assignment_data.course_id)
     for field, value in assignment_data.dict(exclude_unset=True).items():
         setattr(assignment, field, value)
     
-    db.commit()
-    db.refresh(assignment)
+    await versions.bump(db, versions.ASSIGNMENTS)
+    await changes.record(db, changes.ASSIGNMENT, [(assignment_id, None)])
+    await changes.assignment_grades_changed(db, assignment_id)
+    await db.commit()
+    await db.refresh(assignment)
     
     return assignment
 
@@ -84,10 +134,10 @@ async def update_assignment(
 @router.delete("/{assignment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_assignment(
     assignment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_teacher: User = Depends(get_current_teacher)
 ):
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    assignment = await db.get(Assignment, assignment_id)
     
     if not assignment:
         raise HTTPException(
@@ -101,7 +151,27 @@ async def delete_assignment(
             detail="Вы можете удалять только свои задания"
         )
     
-    db.delete(assignment)
-    db.commit()
+    removed = (await db.execute(
+        select(Grade.id, Grade.student_id).where(Grade.assignment_id == assignment_id)
+    )).all()
+    student_ids = [student_id for _, student_id in removed]
+    await db.execute(delete(Grade).where(Grade.assignment_id == assignment_id))
+    await db.delete(assignment)
+    await stats.assignment_removed(db, assignment_id, student_ids)
+    await versions.bump(db, versions.ASSIGNMENTS)
+    await versions.grades_changed(db, student_ids)
+    await changes.record(db, changes.GRADE, removed, deleted=True)
+    await changes.record(db, changes.ASSIGNMENT, [(assignment_id, None)], deleted=True)
+    await db.commit()
+    if student_ids:
+        events.broker.publish(events.GRADES_CHANGED, {"assignment_id": assignment_id}, student_ids)
     
-    return None
\ No newline at end of file
+    return None
+
+
+async def _check_course(db: AsyncSession, course_id: Optional[int]) -> None:
+    if course_id is not None and not await db.get(Course, course_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Курс не найден"
+        )
@@ -1,16 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import User
+from app import versions
 from app.schemas import UserCreate, UserLogin, Token, User as UserSchema
-from app.utils.security import verify_password, get_password_hash, create_access_token
+from app.utils.security import (
+    hash_password_async, verify_and_update_password, create_access_token, TOKEN_ROLE_CLAIM
+)
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -19,29 +23,40 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     
     new_user = User(
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         full_name=user_data.full_name,
         role=user_data.role
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await versions.bump(db, versions.USERS)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == credentials.email).first()
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == credentials.email))
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_and_update_password(credentials.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный email или пароль"
         )
     
-    access_token = create_access_token(data={"sub": str(user.id)})
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    
+    claims = {"sub": str(user.id)}
+    if TOKEN_ROLE_CLAIM:
+        claims["role"] = user.role
+    access_token = create_access_token(data=claims)
     
     return {
         "access_token": access_token,
@@ -0,0 +1,170 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_db
+from app.models import Assignment, Course, Enrollment, User
+from app.schemas import (
+    CourseCreate, Course as CourseSchema, CourseUpdate, EnrollmentRequest, EnrollmentResult,
+    User as UserSchema
+)
+from app.auth import get_current_user, get_current_teacher
+from app.courses import require_course
+from app import versions
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[CourseSchema])
+async def get_courses(
+    term: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Преподаватель видит все курсы, студент - курсы, на которые записан"""
+    stmt = select(Course).order_by(Course.id)
+    if current_user.role == "student":
+        stmt = stmt.join(Enrollment, Enrollment.course_id == Course.id).where(
+            Enrollment.student_id == current_user.id
+        )
+    if term:
+        stmt = stmt.where(Course.term == term)
+    return (await db.scalars(stmt)).all()
+
+
+@router.get("/{course_id}", response_model=CourseSchema)
+async def get_course(
+    course_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    await require_course(db, course_id, current_user)
+    return await db.get(Course, course_id)
+
+
+@router.post("/", response_model=CourseSchema, status_code=status.HTTP_201_CREATED)
+async def create_course(
+    course_data: CourseCreate,
+    db: AsyncSession = Depends(get_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    course = Course(**course_data.model_dump(), created_by=current_teacher.id)
+    db.add(course)
+    await versions.bump(db, versions.COURSES)
+    await db.commit()
+    await db.refresh(course)
+    return course
+
+
+@router.put("/{course_id}", response_model=CourseSchema)
+async def update_course(
+    course_id: int,
+    course_data: CourseUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    course = await _get_own_course(db, course_id, current_teacher, "Вы можете редактировать только свои курсы")
+    for field, value in course_data.model_dump(exclude_unset=True).items():
+        setattr(course, field, value)
+    await versions.bump(db, versions.COURSES)
+    await db.commit()
+    await db.refresh(course)
+    return course
+
+
+@router.delete("/{course_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_course(
+    course_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    course = await _get_own_course(db, course_id, current_teacher, "Вы можете удалять только свои курсы")
+    if await db.scalar(select(Assignment.id).where(Assignment.course_id == course_id).limit(1)):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="В курсе есть задания; удалите или перенесите их"
+        )
+    await db.execute(delete(Enrollment).where(Enrollment.course_id == course_id))
+    await db.delete(course)
+    await versions.bump(db, versions.COURSES)
+    await db.commit()
+    return None
+
+
+@router.get("/{course_id}/students", response_model=List[UserSchema])
+async def get_course_students(
+    course_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    await require_course(db, course_id, current_teacher)
+    return (await db.scalars(
+        select(User).join(Enrollment, Enrollment.student_id == User.id)
+        .where(Enrollment.course_id == course_id).order_by(User.id)
+    )).all()
+
+
+@router.post("/{course_id}/enrollments", response_model=EnrollmentResult)
+async def enroll_students(
+    course_id: int,
+    request_data: EnrollmentRequest,
+    db: AsyncSession = Depends(get_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    """Записывает студентов на курс; уже записанные и несуществующие пропускаются"""
+    await _get_own_course(db, course_id, current_teacher, "Вы можете менять состав только своих курсов")
+    requested = set(request_data.student_ids)
+    students = set((await db.scalars(
+        select(User.id).where(User.id.in_(requested), User.role == "student")
+    )).all()) if requested else set()
+    enrolled = set((await db.scalars(
+        select(Enrollment.student_id).where(Enrollment.course_id == course_id, Enrollment.student_id.in_(students))
+    )).all()) if students else set()
+
+    new = sorted(students - enrolled)
+    if new:
+        await db.execute(insert(Enrollment), [{"course_id": course_id, "student_id": student_id} for student_id in new])
+        await versions.bump(db, versions.COURSES)
+        await db.commit()
+
+    return EnrollmentResult(
+        enrolled=len(new),
+        already_enrolled=len(enrolled),
+        not_found=sorted(requested - students)
+    )
+
+
+@router.delete("/{course_id}/enrollments/{student_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def unenroll_student(
+    course_id: int,
+    student_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    await _get_own_course(db, course_id, current_teacher, "Вы можете менять состав только своих курсов")
+    result = await db.execute(
+        delete(Enrollment).where(Enrollment.course_id == course_id, Enrollment.student_id == student_id)
+    )
+    if not result.rowcount:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Студент не записан на этот курс"
+        )
+    await versions.bump(db, versions.COURSES)
+    await db.commit()
+    return None
+
+
+async def _get_own_course(db: AsyncSession, course_id: int, teacher, detail: str) -> Course:
+    course = await db.get(Course, course_id)
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Курс не найден"
+        )
+    if course.created_by != teacher.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail
+        )
+    return course
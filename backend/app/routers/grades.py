@@ -1,43 +1,208 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from typing import List, Optional
+from array import array
 from datetime import datetime
+import base64
+import csv
+import io
+import json
+import sys
 from app.database import get_db
-from app.models import Grade, User, Assignment
-from app.schemas import GradeCreate, Grade as GradeSchema, GradeUpdate, GradeWithDetails
-from app.auth import get_current_user, get_current_teacher
+from app.models import Enrollment, Grade, User, Assignment
+from app.schemas import (
+    GradeCreate, Grade as GradeSchema, GradeUpdate, GradeWithDetails,
+    GradeBulkError, GradeBulkResult, GradeMatrix, MatrixStudent, MatrixAssignment
+)
+from app.auth import Principal, get_current_user, get_current_teacher, get_stream_user
+from app.utils.loading import loader_options
+from app.utils.pagination import MAX_PAGE_SIZE, paginate, parse_fields, projected_response
+from app.utils import fast_json
+from app.utils.fast_json import fast_response, row_projection
+from app.utils.http_cache import conditional_get
+from app.utils.response_cache import cached_json
+from app import changes, courses, events, stats, versions
 
 router = APIRouter()
 
+DUPLICATE_GRADE_DETAIL = "Оценка для этого студента по данному заданию уже существует"
+NOT_ENROLLED_DETAIL = "Студент не записан на курс этого задания"
+
 
 @router.get("/", response_model=List[GradeWithDetails])
 async def get_grades(
+    request: Request,
+    response: Response,
     assignment_id: int = None,
     student_id: int = None,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = None,
+    fields: Optional[str] = None,
+    course_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Grade)
+    columns = parse_fields(fields, Grade, GradeWithDetails)
+    await courses.require_course(db, course_id, current_user)
+
+    if current_user.role == "student":
+        grades_version, scope = versions.student_grades(current_user.id), f"student:{current_user.id}"
+    else:
+        grades_version, scope = versions.GRADES, "teacher"
+    not_modified = await conditional_get(
+        request, response, db, [grades_version, versions.ASSIGNMENTS, versions.USERS], scope
+    )
+    if not_modified:
+        return not_modified
+
+    fast = not columns and fast_json.FAST_JSON
+    if columns:
+        stmt = select(*[getattr(Grade, name) for name in columns])
+    elif fast:
+        projection = row_projection(Grade, GradeWithDetails)
+        stmt = projection.select()
+    else:
+        stmt = select(Grade).options(*loader_options(Grade, GradeWithDetails))
 
     if current_user.role == "student":
-        query = query.filter(Grade.student_id == current_user.id)
+        stmt = stmt.where(Grade.student_id == current_user.id)
     elif student_id:
-        query = query.filter(Grade.student_id == student_id)
+        stmt = stmt.where(Grade.student_id == student_id)
     
     if assignment_id:
-        query = query.filter(Grade.assignment_id == assignment_id)
+        stmt = stmt.where(Grade.assignment_id == assignment_id)
+    if course_id is not None:
+        stmt = stmt.where(Grade.assignment_id.in_(courses.assignment_ids(course_id)))
     
-    grades = query.all()
+    grades = await paginate(db, stmt, Grade.id, request, response, limit, after, rows=bool(columns) or fast)
+    if columns:
+        return projected_response(grades, response)
+    if fast:
+        return fast_response([projection.build(row) for row in grades], response)
     return grades
 
 
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_grades(
+    request: Request,
+    last_event_id: Optional[str] = Query(None, description="Продолжить после события (вместо заголовка Last-Event-ID)"),
+    current_user: Principal = Depends(get_stream_user)
+):
+    """Поток событий об оценках (text/event-stream) вместо периодического опроса.
+
+    События grade.created/grade.updated/grade.deleted содержат оценку без
+    вложенных объектов, grades.changed - сигнал перезагрузить список, reset -
+    пропущенные события восстановить нельзя. Студент получает только свои оценки.
+    """
+    subscription = events.broker.subscribe(current_user.id, current_user.role)
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Слишком много подключений к потоку событий"
+        )
+
+    backlog = []
+    resume_from = request.headers.get("Last-Event-ID") or last_event_id
+    if resume_from:
+        backlog = events.broker.replay(subscription, resume_from)
+        if backlog is None:
+            backlog = [events.broker.reset_event()]
+
+    return StreamingResponse(
+        events.broker.stream(subscription, backlog),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/matrix", response_model=GradeMatrix)
+async def get_grade_matrix(
+    request: Request,
+    response: Response,
+    encoding: str = Query("json", pattern="^(json|float32)$"),
+    course_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    """Ведомость студенты x задания: заголовки строк и столбцов один раз и плотный массив баллов.
+
+    encoding=float32 отдает баллы одной base64-строкой (4 байта на ячейку)
+    вместо JSON-массивов; точность float32 - около 7 значащих цифр.
+    """
+    await courses.require_course(db, course_id, current_teacher)
+    not_modified = await conditional_get(
+        request, response, db, [versions.GRADES, versions.ASSIGNMENTS, versions.USERS, versions.COURSES], "teacher"
+    )
+    if not_modified:
+        return not_modified
+    return await cached_json(
+        response, GradeMatrix, lambda: _build_matrix(db, encoding, course_id), trusted=fast_json.FAST_JSON
+    )
+
+
+async def _build_matrix(db: AsyncSession, encoding: str, course_id: int = None) -> dict:
+    """Заголовки из двух запросов, баллы - из одного запроса трех колонок без join.
+
+    С course_id строки - записанные на курс студенты, столбцы - задания курса.
+    """
+    student_filter = [User.role == "student"]
+    assignment_filter = []
+    grade_filter = []
+    if course_id is not None:
+        student_filter.append(User.id.in_(courses.student_ids(course_id)))
+        assignment_filter.append(Assignment.course_id == course_id)
+        grade_filter.append(Grade.assignment_id.in_(courses.assignment_ids(course_id)))
+
+    students_projection = row_projection(User, MatrixStudent)
+    assignments_projection = row_projection(Assignment, MatrixAssignment)
+    students = [
+        students_projection.build(row) for row in await db.execute(
+            students_projection.select().where(*student_filter).order_by(User.id)
+        )
+    ]
+    assignments = [
+        assignments_projection.build(row)
+        for row in await db.execute(assignments_projection.select().where(*assignment_filter).order_by(Assignment.id))
+    ]
+    rows = {student["id"]: index for index, student in enumerate(students)}
+    columns = {assignment["id"]: index for index, assignment in enumerate(assignments)}
+    width = len(assignments)
+
+    size = len(students) * width
+    cells = array("f", [float("nan")]) * size if encoding == "float32" else [None] * size
+    for student_id, assignment_id, score in await db.execute(
+        select(Grade.student_id, Grade.assignment_id, Grade.score).where(*grade_filter)
+    ):
+        row = rows.get(student_id)
+        if row is not None:
+            cells[row * width + columns[assignment_id]] = float(score)
+
+    matrix = {"students": students, "assignments": assignments, "encoding": encoding, "scores": None, "data": None}
+    if encoding == "float32":
+        if sys.byteorder == "big":
+            cells.byteswap()
+        matrix["data"] = base64.b64encode(cells.tobytes()).decode("ascii")
+    else:
+        matrix["scores"] = [cells[row * width:(row + 1) * width] for row in range(len(students))]
+    return matrix
+
+
 @router.get("/{grade_id}", response_model=GradeWithDetails)
 async def get_grade(
     grade_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    grade = db.query(Grade).filter(Grade.id == grade_id).first()
+    grade = await db.scalar(
+        select(Grade).options(
+            *loader_options(Grade, GradeWithDetails)
+        ).where(Grade.id == grade_id)
+    )
     
     if not grade:
         raise HTTPException(
@@ -56,35 +221,32 @@ async def get_grade(
 @router.post("/", response_model=GradeSchema, status_code=status.HTTP_201_CREATED)
 async def create_grade(
     grade_data: GradeCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_teacher: User = Depends(get_current_teacher)
 ):
-    assignment = db.query(Assignment).filter(Assignment.id == grade_data.assignment_id).first()
+    assignment = await db.get(Assignment, grade_data.assignment_id)
     if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Задание не найдено"
         )
-    student = db.query(User).filter(
+    student = await db.scalar(select(User).where(
         User.id == grade_data.student_id,
         User.role == "student"
-    ).first()
+    ))
     if not student:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Студент не найден"
         )
-    existing_grade = db.query(Grade).filter(
-        Grade.assignment_id == grade_data.assignment_id,
-        Grade.student_id == grade_data.student_id
-    ).first()
-    
-    if existing_grade:
+    if assignment.course_id is not None and not await db.scalar(select(Enrollment.student_id).where(
+        Enrollment.course_id == assignment.course_id,
+        Enrollment.student_id == student.id
+    )):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Оценка для этого студента по данному заданию уже существует"
+            detail=NOT_ENROLLED_DETAIL
         )
-    
     if grade_data.score < 0 or grade_data.score > assignment.max_score:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -97,20 +259,252 @@ async def create_grade(
     )
     
     db.add(new_grade)
-    db.commit()
-    db.refresh(new_grade)
+    try:
+        # Повтор отсекает уникальный индекс (assignment_id, student_id), а не предварительный SELECT
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DUPLICATE_GRADE_DETAIL
+        )
+    await stats.grade_added(db, new_grade.student_id, new_grade.assignment_id, new_grade.score)
+    await versions.grades_changed(db, [new_grade.student_id])
+    await changes.record(db, changes.GRADE, [(new_grade.id, new_grade.student_id)])
+    await db.commit()
+    await db.refresh(new_grade)
+    _publish(events.GRADE_CREATED, new_grade)
     
     return new_grade
 
 
+@router.post(
+    "/bulk", response_model=GradeBulkResult,
+    responses={status.HTTP_422_UNPROCESSABLE_CONTENT: {"model": GradeBulkResult, "description": "Импорт отклонен"}}
+)
+async def bulk_create_grades(
+    request: Request,
+    upsert: bool = False,
+    partial: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    """Массовый импорт оценок из JSON-массива или CSV.
+
+    Проверки выполняются IN-запросами на каждый тип сущности (по stats.CHUNK
+    параметров), запись - одним executemany в одной транзакции. При upsert=true существующие оценки
+    обновляются, иначе считаются ошибкой. Без partial=true любая ошибка
+    отменяет импорт целиком: ответ 422 с тем же телом и списком ошибок.
+    """
+    raw_rows = await _read_bulk_rows(request)
+
+    errors = []
+    rows = []
+    for index, raw in enumerate(raw_rows, start=1):
+        try:
+            rows.append((index, GradeCreate.model_validate(raw)))
+        except ValidationError as e:
+            errors.append(GradeBulkError(row=index, detail=_format_validation_error(e)))
+
+    assignment_ids = {row.assignment_id for _, row in rows}
+    student_ids = {row.student_id for _, row in rows}
+
+    max_scores = {}
+    assignment_courses = {}
+    students = set()
+    for chunk in _chunks(assignment_ids):
+        for assignment_id, max_score, course_id in await db.execute(
+            select(Assignment.id, Assignment.max_score, Assignment.course_id).where(Assignment.id.in_(chunk))
+        ):
+            max_scores[assignment_id] = max_score
+            assignment_courses[assignment_id] = course_id
+    for chunk in _chunks(student_ids):
+        students.update(await db.scalars(select(User.id).where(User.id.in_(chunk), User.role == "student")))
+    course_ids = {course_id for course_id in assignment_courses.values() if course_id is not None}
+    enrollments = set()
+    for course_chunk, student_chunk in _pair_chunks(course_ids, students):
+        enrollments.update((await db.execute(
+            select(Enrollment.course_id, Enrollment.student_id)
+            .where(Enrollment.course_id.in_(course_chunk), Enrollment.student_id.in_(student_chunk))
+        )).all())
+    existing = {
+        (assignment_id, student_id): grade_id
+        for grade_id, assignment_id, student_id in await _grades_by_pairs(db, assignment_ids, student_ids)
+    }
+
+    now = datetime.now()
+    to_insert = []
+    to_update = []
+    seen = set()
+    for index, row in rows:
+        key = (row.assignment_id, row.student_id)
+        if row.assignment_id not in max_scores:
+            detail = "Задание не найдено"
+        elif row.student_id not in students:
+            detail = "Студент не найден"
+        elif assignment_courses[row.assignment_id] is not None and \
+                (assignment_courses[row.assignment_id], row.student_id) not in enrollments:
+            detail = NOT_ENROLLED_DETAIL
+        elif key in seen:
+            detail = "Оценка для этого студента по данному заданию повторяется в импорте"
+        elif key in existing and not upsert:
+            detail = DUPLICATE_GRADE_DETAIL
+        elif row.score < 0 or row.score > max_scores[row.assignment_id]:
+            detail = f"Оценка должна быть от 0 до {max_scores[row.assignment_id]}"
+        else:
+            detail = None
+
+        if detail:
+            errors.append(GradeBulkError(row=index, detail=detail))
+            continue
+
+        seen.add(key)
+        if key in existing:
+            to_update.append({
+                "id": existing[key],
+                "score": row.score,
+                "comment": row.comment,
+                "graded_at": now
+            })
+        else:
+            to_insert.append({**row.model_dump(), "submitted_at": now, "graded_at": now})
+
+    errors.sort(key=lambda error: error.row)
+    if errors and not partial:
+        return JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            content=jsonable_encoder(GradeBulkResult(created=0, updated=0, errors=errors))
+        )
+
+    if to_insert:
+        try:
+            await db.execute(insert(Grade), to_insert)
+        except IntegrityError:
+            # Оценку добавили параллельно между проверкой и вставкой
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Оценки изменились во время импорта, повторите запрос"
+            )
+    if to_update:
+        await db.execute(update(Grade), to_update)
+    if seen:
+        # executemany не возвращает id вставленных строк - они выбираются теми же IN-запросами, что и existing
+        written = sorted(
+            (grade_id, student_id)
+            for grade_id, assignment_id, student_id in await _grades_by_pairs(db, assignment_ids, student_ids)
+            if (assignment_id, student_id) in seen
+        )
+        await changes.record(db, changes.GRADE, written)
+    await stats.refresh_students(db, {student_id for _, student_id in seen})
+    await stats.refresh_assignments(db, {assignment_id for assignment_id, _ in seen})
+    if seen:
+        await versions.grades_changed(db, {student_id for _, student_id in seen})
+    await db.commit()
+    if seen:
+        events.broker.publish(events.GRADES_CHANGED, {}, {student_id for _, student_id in seen})
+
+    return GradeBulkResult(created=len(to_insert), updated=len(to_update), errors=errors)
+
+
+def _chunks(values) -> list:
+    """Списки по stats.CHUNK значений для IN"""
+    values = sorted(values)
+    return [values[start:start + stats.CHUNK] for start in range(0, len(values), stats.CHUNK)]
+
+
+def _pair_chunks(first, second) -> list:
+    """Пары списков для двух IN в одном запросе: вместе не больше stats.CHUNK параметров"""
+    pairs = []
+    for first_chunk in _chunks(first) if second else ():
+        size = max(stats.CHUNK - len(first_chunk), 1)
+        values = sorted(second)
+        pairs.extend((first_chunk, values[start:start + size]) for start in range(0, len(values), size))
+    return pairs
+
+
+async def _grades_by_pairs(db: AsyncSession, assignment_ids, student_ids) -> list:
+    """(id, assignment_id, student_id) оценок по заданиям assignment_ids у студентов student_ids"""
+    rows = []
+    for assignment_chunk, student_chunk in _pair_chunks(assignment_ids, student_ids):
+        rows.extend((await db.execute(
+            select(Grade.id, Grade.assignment_id, Grade.student_id)
+            .where(Grade.assignment_id.in_(assignment_chunk), Grade.student_id.in_(student_chunk))
+        )).all())
+    return rows
+
+
+async def _read_bulk_rows(request: Request) -> list:
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Ожидается CSV-файл в поле file"
+            )
+        return _parse_csv(await upload.read())
+
+    body = await request.body()
+    if content_type.startswith("text/csv"):
+        return _parse_csv(body)
+
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный JSON"
+        )
+    if not isinstance(data, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Ожидается массив оценок"
+        )
+    return data
+
+
+def _parse_csv(content: bytes) -> list:
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV должен быть в кодировке UTF-8"
+        )
+    reader = csv.DictReader(io.StringIO(text))
+    missing = {"assignment_id", "student_id", "score"} - set(reader.fieldnames or [])
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"В CSV отсутствуют колонки: {', '.join(sorted(missing))}"
+        )
+    return [
+        {key: value for key, value in row.items() if key and value not in (None, "")}
+        for row in reader
+    ]
+
+
+def _publish(event_type: str, grade: Grade) -> None:
+    events.broker.publish(event_type, jsonable_encoder(GradeSchema.model_validate(grade)), [grade.student_id])
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
 @router.put("/{grade_id}", response_model=GradeSchema)
 async def update_grade(
     grade_id: int,
     grade_data: GradeUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_teacher: User = Depends(get_current_teacher)
 ):
-    grade = db.query(Grade).filter(Grade.id == grade_id).first()
+    grade = await db.get(Grade, grade_id)
     
     if not grade:
         raise HTTPException(
@@ -119,20 +513,26 @@ async def update_grade(
         )
 
     if grade_data.score is not None:
-        assignment = db.query(Assignment).filter(Assignment.id == grade.assignment_id).first()
+        assignment = await db.get(Assignment, grade.assignment_id)
         if grade_data.score < 0 or grade_data.score > assignment.max_score:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Оценка должна быть от 0 до {assignment.max_score}"
             )
     
+    old_score = grade.score
     for field, value in grade_data.dict(exclude_unset=True).items():
         setattr(grade, field, value)
     
     grade.graded_at = datetime.now()
     
-    db.commit()
-    db.refresh(grade)
+    await db.flush()
+    await stats.grade_changed(db, grade.student_id, grade.assignment_id, old_score, grade.score)
+    await versions.grades_changed(db, [grade.student_id])
+    await changes.record(db, changes.GRADE, [(grade.id, grade.student_id)])
+    await db.commit()
+    await db.refresh(grade)
+    _publish(events.GRADE_UPDATED, grade)
     
     return grade
 
@@ -140,10 +540,10 @@ async def update_grade(
 @router.delete("/{grade_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_grade(
     grade_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_teacher: User = Depends(get_current_teacher)
 ):
-    grade = db.query(Grade).filter(Grade.id == grade_id).first()
+    grade = await db.get(Grade, grade_id)
     
     if not grade:
         raise HTTPException(
@@ -151,7 +551,15 @@ async def delete_grade(
             detail="Оценка не найдена"
         )
     
-    db.delete(grade)
-    db.commit()
+    await db.delete(grade)
+    await stats.grade_removed(db, grade.student_id, grade.assignment_id, grade.score)
+    await versions.grades_changed(db, [grade.student_id])
+    await changes.record(db, changes.GRADE, [(grade_id, grade.student_id)], deleted=True)
+    await db.commit()
+    events.broker.publish(
+        events.GRADE_DELETED,
+        {"id": grade_id, "assignment_id": grade.assignment_id, "student_id": grade.student_id},
+        [grade.student_id]
+    )
     
     return None
\ No newline at end of file
@@ -1,11 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from app.database import get_db
-from app.models import User, Assignment, Grade
-from app.schemas import StudentReport, CourseReport
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, contains_eager
+from collections import defaultdict
+from itertools import chain
+from datetime import date
+from typing import Optional
+import csv
+import importlib.util
+import io
+import os
+import tempfile
+from app.database import get_read_db, ReadSessionLocal
+from app.models import User, Assignment, Grade, StudentStats
+from app.schemas import (
+    StudentReport, CourseReport, GradeWithDetails, User as UserSchema, Assignment as AssignmentSchema,
+    AssignmentDistribution, AssignmentDistributions, ReportJob, ReportJobRequest
+)
 from app.auth import get_current_teacher
+from app.utils import fast_json
+from app.utils.fast_json import row_projection
+from app.utils.loading import loader_options
+from app.utils.http_cache import conditional_get
+from app.utils.response_cache import cached_json
+from app import courses, jobs, stats, versions
 
 router = APIRouter()
 
@@ -13,13 +34,40 @@ router = APIRouter()
 @router.get("/student/{student_id}", response_model=StudentReport)
 async def get_student_report(
     student_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    course_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_teacher: User = Depends(get_current_teacher)
 ):
-    student = db.query(User).filter(
-        User.id == student_id,
-        User.role == "student"
-    ).first()
+    await courses.require_course(db, course_id, current_teacher)
+    not_modified = await conditional_get(
+        request, response, db,
+        [versions.student_grades(student_id), versions.ASSIGNMENTS, versions.USERS]
+        + ([versions.COURSES] if course_id is not None else [])
+    )
+    if not_modified:
+        return not_modified
+    fast = fast_json.FAST_JSON
+    return await cached_json(
+        response, StudentReport, lambda: _build_student_report(db, student_id, fast, course_id), trusted=fast
+    )
+
+
+async def _build_student_report(
+    db: AsyncSession, student_id: int, fast: bool = False, course_id: int = None
+) -> dict:
+    """fast=True собирает готовые к сериализации словари из строк (см. utils.fast_json).
+
+    С course_id в отчет попадают только оценки по заданиям курса.
+    """
+    student_filter = (User.id == student_id, User.role == "student")
+    if fast:
+        students = row_projection(User, UserSchema)
+        row = (await db.execute(students.select().where(*student_filter))).first()
+        student = students.build(row) if row is not None else None
+    else:
+        student = await db.scalar(select(User).where(*student_filter))
     
     if not student:
         raise HTTPException(
@@ -27,56 +75,600 @@ async def get_student_report(
             detail="Студент не найден"
         )
     
-    grades = db.query(Grade).filter(Grade.student_id == student_id).all()
+    grade_filter = [Grade.student_id == student_id, *_course_grades(course_id)]
+    if fast:
+        projection = row_projection(Grade, GradeWithDetails)
+        grades = [
+            projection.build(row) for row in await db.execute(
+                projection.select().where(*grade_filter).order_by(Grade.id)
+            )
+        ]
+    else:
+        grades = (await db.scalars(
+            select(Grade).options(
+                *loader_options(Grade, GradeWithDetails)
+            ).where(*grade_filter).order_by(Grade.id)
+        )).all()
     
-    total_assignments = db.query(Assignment).count()
-    completed_assignments = len(grades)
-    average_score = db.query(func.avg(Grade.score)).filter(
-        Grade.student_id == student_id
-    ).scalar() or 0
+    if course_id is None:
+        student_stats = await db.get(StudentStats, student_id)
+        completed_assignments, score_sum = (
+            (student_stats.grade_count, student_stats.score_sum) if student_stats else (0, 0)
+        )
+    else:
+        completed_assignments, score_sum = (await _course_totals(db, course_id, student_id)).get(student_id, (0, 0))
+    average_score = score_sum / completed_assignments if completed_assignments else 0
     
+    final_grades = await _final_grades(db, student_id, course_id)
+
     return {
         "student": student,
-        "total_assignments": total_assignments,
+        "total_assignments": await _total_assignments(db, course_id),
         "completed_assignments": completed_assignments,
-        "average_score": round(average_score, 2),
+        "average_score": float(round(average_score, 2)),
+        **_final_grade_fields(final_grades.get(student_id)),
         "grades": grades
     }
 
 
+def _course_grades(course_id: Optional[int]) -> list:
+    """Условия WHERE для оценок курса (пусто - весь журнал)"""
+    return [] if course_id is None else [Grade.assignment_id.in_(courses.assignment_ids(course_id))]
+
+
+def _course_students(course_id: Optional[int]) -> list:
+    """Условия WHERE для студентов курса (без курса - все студенты)"""
+    conditions = [User.role == "student"]
+    if course_id is not None:
+        conditions.append(User.id.in_(courses.student_ids(course_id)))
+    return conditions
+
+
+async def _total_assignments(db: AsyncSession, course_id: Optional[int]) -> int:
+    if course_id is None:
+        return await stats.total_assignments(db)
+    return await courses.total_assignments(db, course_id)
+
+
+async def _course_totals(db: AsyncSession, course_id: int, student_id: int = None) -> dict:
+    """(число оценок, сумма баллов) по студентам в пределах курса.
+
+    student_stats хранит итоги по всему журналу, поэтому для курса они
+    считаются агрегатом по индексу ux_grades_assignment_student.
+    """
+    stmt = select(Grade.student_id, func.count(Grade.id), func.sum(Grade.score)).where(
+        *_course_grades(course_id)
+    ).group_by(Grade.student_id)
+    if student_id is not None:
+        stmt = stmt.where(Grade.student_id == student_id)
+    return {row[0]: (row[1], row[2]) for row in await db.execute(stmt)}
+
+
+async def _final_grades(db: AsyncSession, student_id: int = None, course_id: int = None) -> dict:
+    """Итоговые оценки (app.grading) по студентам одним запросом; без numpy - пустой словарь"""
+    try:
+        from app import grading
+    except ImportError:
+        return {}
+    stmt = select(
+        Grade.student_id, Grade.assignment_id, Grade.score,
+        Assignment.max_score, Assignment.weight, Assignment.category
+    ).join(Assignment, Assignment.id == Grade.assignment_id)
+    if student_id is not None:
+        stmt = stmt.where(Grade.student_id == student_id)
+    if course_id is not None:
+        stmt = stmt.where(Assignment.course_id == course_id)
+    return grading.compute(await db.execute(stmt))
+
+
+def _final_grade_fields(final_grade) -> dict:
+    """Поля StudentReport в порядке схемы (важно для побайтного совпадения быстрого пути)"""
+    if final_grade is None:
+        return {"percentage": None, "letter_grade": None, "category_percentages": {}}
+    return {
+        "percentage": final_grade.percentage,
+        "letter_grade": final_grade.letter_grade,
+        "category_percentages": final_grade.category_percentages,
+    }
+
+
 @router.get("/course", response_model=CourseReport)
 async def get_course_report(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    course_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_teacher: User = Depends(get_current_teacher)
 ):
-    students = db.query(User).filter(User.role == "student").all()
-    total_assignments = db.query(Assignment).count()
-    
+    await courses.require_course(db, course_id, current_teacher)
+    not_modified = await conditional_get(
+        request, response, db, [versions.GRADES, versions.ASSIGNMENTS, versions.USERS, versions.COURSES]
+    )
+    if not_modified:
+        return not_modified
+    fast = fast_json.FAST_JSON
+    return await cached_json(
+        response, CourseReport, lambda: _build_course_report(db, fast, course_id), trusted=fast
+    )
+
+
+async def _build_course_report(db: AsyncSession, fast: bool = False, course_id: int = None) -> dict:
+    """Отчет по курсу за фиксированное число запросов, не зависящее от числа студентов.
+
+    Без course_id - весь журнал, средние из материализованной таблицы
+    student_stats. С course_id - записанные на курс студенты и задания курса.
+    fast=True собирает словари из строк вместо ORM-объектов (см. utils.fast_json).
+    """
+    student_filter = _course_students(course_id)
+
+    if fast:
+        projection = row_projection(User, UserSchema)
+        students = [
+            projection.build(row) for row in await db.execute(
+                projection.select().where(*student_filter).order_by(User.id)
+            )
+        ]
+    else:
+        students = (await db.scalars(
+            select(User).where(*student_filter).order_by(User.id)
+        )).all()
+    total_assignments = await _total_assignments(db, course_id)
+
+    if course_id is None:
+        aggregates = {
+            row.student_id: (row.grade_count, row.score_sum / row.grade_count if row.grade_count else None)
+            for row in await db.scalars(
+                select(StudentStats).join(User, User.id == StudentStats.student_id).where(
+                    User.role == "student"
+                )
+            )
+        }
+    else:
+        aggregates = {
+            student_id: (count, score_sum / count)
+            for student_id, (count, score_sum) in (await _course_totals(db, course_id)).items()
+        }
+
+    grades_by_student = defaultdict(list)
+    if fast:
+        projection = row_projection(Grade, GradeWithDetails)
+        for row in await db.execute(
+            projection.select().where(
+                Grade.student_id.in_(select(User.id).where(*student_filter)), *_course_grades(course_id)
+            ).order_by(Grade.student_id, Grade.id)
+        ):
+            grade = projection.build(row)
+            grades_by_student[grade["student_id"]].append(grade)
+    else:
+        grades = await db.scalars(
+            select(Grade).join(User, User.id == Grade.student_id).where(
+                *student_filter, *_course_grades(course_id)
+            ).options(
+                joinedload(Grade.assignment),
+                contains_eager(Grade.student)
+            ).order_by(Grade.student_id, Grade.id)
+        )
+        for grade in grades:
+            grades_by_student[grade.student_id].append(grade)
+
+    final_grades = await _final_grades(db, course_id=course_id)
+
     student_reports = []
     total_scores = []
-    
+    percentages = []
+
     for student in students:
-        grades = db.query(Grade).filter(Grade.student_id == student.id).all()
-        
-        if grades:
-            avg_score = sum(g.score for g in grades) / len(grades)
+        student_id = student["id"] if fast else student.id
+        count, avg_score = aggregates.get(student_id, (0, None))
+
+        if count:
             total_scores.append(avg_score)
         else:
             avg_score = 0
-        
+
+        final_grade = final_grades.get(student_id)
+        if final_grade is not None and final_grade.percentage is not None:
+            percentages.append(final_grade.percentage)
+
         student_reports.append({
             "student": student,
             "total_assignments": total_assignments,
-            "completed_assignments": len(grades),
-            "average_score": round(avg_score, 2),
-            "grades": grades
+            "completed_assignments": count,
+            "average_score": float(round(avg_score, 2)),
+            **_final_grade_fields(final_grade),
+            "grades": grades_by_student.get(student_id, [])
         })
-    
+
     overall_average = sum(total_scores) / len(total_scores) if total_scores else 0
-    
+
     return {
         "total_students": len(students),
         "total_assignments": total_assignments,
-        "average_score": round(overall_average, 2),
+        "average_score": float(round(overall_average, 2)),
+        "average_percentage": round(sum(percentages) / len(percentages), 2) if percentages else None,
         "student_reports": student_reports
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/assignments", response_model=AssignmentDistributions)
+async def get_assignments_report(
+    request: Request,
+    response: Response,
+    bins: int = Query(10, ge=1, le=100, description="Число корзин гистограммы"),
+    course_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    """Распределения оценок по всем заданиям (или заданиям курса course_id)"""
+    await courses.require_course(db, course_id, current_teacher)
+    not_modified = await conditional_get(request, response, db, [versions.GRADES, versions.ASSIGNMENTS])
+    if not_modified:
+        return not_modified
+    return await cached_json(
+        response, AssignmentDistributions, lambda: _build_assignment_distributions(db, bins, course_id=course_id),
+        trusted=fast_json.FAST_JSON
+    )
+
+
+@router.get("/assignment/{assignment_id}", response_model=AssignmentDistribution)
+async def get_assignment_report(
+    assignment_id: int,
+    request: Request,
+    response: Response,
+    bins: int = Query(10, ge=1, le=100, description="Число корзин гистограммы"),
+    db: AsyncSession = Depends(get_read_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    """Распределение оценок по одному заданию: среднее, медиана, процентили, гистограмма"""
+    not_modified = await conditional_get(request, response, db, [versions.GRADES, versions.ASSIGNMENTS])
+    if not_modified:
+        return not_modified
+
+    async def build() -> dict:
+        report = await _build_assignment_distributions(db, bins, assignment_id)
+        if not report["assignments"]:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Задание не найдено"
+            )
+        return report["assignments"][0]
+
+    return await cached_json(response, AssignmentDistribution, build, trusted=fast_json.FAST_JSON)
+
+
+async def _build_assignment_distributions(
+    db: AsyncSession, bins: int, assignment_id: int = None, course_id: int = None
+) -> dict:
+    """Статистика по заданиям из двух запросов: задания и столбцы (задание, балл) всех оценок"""
+    try:
+        import numpy as np
+        from app import analytics
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Для статистики по заданиям требуется пакет numpy"
+        )
+
+    projection = row_projection(Assignment, AssignmentSchema)
+    assignments_stmt = projection.select().order_by(Assignment.id)
+    grades_stmt = select(Grade.assignment_id, Grade.score)
+    if assignment_id is not None:
+        assignments_stmt = assignments_stmt.where(Assignment.id == assignment_id)
+        grades_stmt = grades_stmt.where(Grade.assignment_id == assignment_id)
+    if course_id is not None:
+        assignments_stmt = assignments_stmt.where(Assignment.course_id == course_id)
+        grades_stmt = grades_stmt.where(*_course_grades(course_id))
+
+    assignments = [projection.build(row) for row in await db.execute(assignments_stmt)]
+    if not assignments:
+        return {"assignments": []}
+    rows = (await db.execute(grades_stmt)).all()
+    # fromiter по плоской последовательности на порядок быстрее np.array(rows) из объектов Row
+    columns = np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=2 * len(rows)).reshape(-1, 2)
+
+    max_scores = np.array([assignment["max_score"] for assignment in assignments], dtype=np.float64)
+    result = analytics.distributions(
+        np.array([assignment["id"] for assignment in assignments], dtype=np.int64),
+        max_scores,
+        columns[:, 0].astype(np.int64),
+        columns[:, 1],
+        bins
+    )
+    edges = np.linspace(0, 1, bins + 1).round(4).tolist()
+
+    def distribution(index: int, scale: float, digits: int) -> dict:
+        def value(array) -> float:
+            number = float(array[index])
+            return None if np.isnan(number) else round(number / scale, digits)
+
+        return {
+            "mean": value(result["mean"]),
+            "median": value(result["median"]),
+            "std": value(result["std"]),
+            "min": value(result["min"]),
+            "max": value(result["max"]),
+            "percentiles": {f"p{p}": value(values) for p, values in result["percentiles"].items()},
+        }
+
+    return {"assignments": [
+        {
+            "assignment": assignment,
+            "count": int(result["count"][index]),
+            "scores": distribution(index, 1.0, 2),
+            "normalized": distribution(index, float(max_scores[index]), 4),
+            "histogram": [
+                {"lower": edges[bucket], "upper": edges[bucket + 1], "count": int(count)}
+                for bucket, count in enumerate(result["histogram"][index].tolist())
+            ],
+        }
+        for index, assignment in enumerate(assignments)
+    ]}
+
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+@router.get("/course/export")
+async def export_course_report(
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    layout: str = Query("summary", pattern="^(summary|grades|matrix)$"),
+    course_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    """Потоковая выгрузка отчета по курсу.
+
+    summary - строка на студента, grades - строка на оценку,
+    matrix - ведомость студент x задание. Строки читаются из БД пачками
+    через yield_per, поэтому память не зависит от числа оценок.
+    С course_id - только записанные на курс студенты и задания курса.
+    """
+    await courses.require_course(db, course_id, current_teacher)
+    filename = f"{jobs.export_name(layout, course_id)}_{date.today().isoformat()}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if format == "xlsx":
+        path = await _write_xlsx(layout, course_id)
+        return FileResponse(
+            path,
+            media_type=EXPORT_CONTENT_TYPES["xlsx"],
+            headers=headers,
+            background=BackgroundTask(os.unlink, path)
+        )
+
+    return StreamingResponse(
+        _stream_csv(layout, course_id),
+        media_type=EXPORT_CONTENT_TYPES["csv"],
+        headers=headers
+    )
+
+
+async def _stream_csv(layout: str, course_id: Optional[int] = None):
+    # Сессия открывается внутри генератора: ответ отдается уже после
+    # выхода из зависимостей запроса.
+    async with ReadSessionLocal() as db:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write("\ufeff")
+        async for batch in _export_batches(db, layout, course_id):
+            writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+
+async def _write_xlsx(layout: str, course_id: Optional[int] = None) -> str:
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Для выгрузки в XLSX требуется пакет openpyxl"
+        )
+
+    def append(sheet, batch):
+        for row in batch:
+            sheet.append(row)
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title="Отчет")
+    async with ReadSessionLocal() as db:
+        async for batch in _export_batches(db, layout, course_id):
+            await run_in_threadpool(append, sheet, batch)
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    await run_in_threadpool(workbook.save, path)
+    return path
+
+
+async def _export_batches(db: AsyncSession, layout: str, course_id: Optional[int] = None):
+    """Строки выгрузки пачками по EXPORT_BATCH_SIZE; первая пачка - заголовок"""
+    batch = []
+    async for row in _export_rows(db, layout, course_id):
+        batch.append(row)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _export_rows(db: AsyncSession, layout: str, course_id: Optional[int] = None):
+    """Строки выгрузки; с course_id - те же фильтры курса, что и в _build_course_report"""
+    if layout == "summary":
+        total_assignments = await _total_assignments(db, course_id)
+        yield ["Студент", "Email", "Всего заданий", "Выполнено", "Средний балл"]
+        if course_id is None:
+            totals = select(
+                StudentStats.student_id, StudentStats.grade_count, StudentStats.score_sum
+            ).subquery()
+        else:
+            # student_stats - итоги по всему журналу; для курса агрегат по его оценкам
+            totals = select(
+                Grade.student_id,
+                func.count(Grade.id).label("grade_count"),
+                func.sum(Grade.score).label("score_sum"),
+            ).where(*_course_grades(course_id)).group_by(Grade.student_id).subquery()
+        rows = await db.stream(
+            select(User.full_name, User.email, totals.c.grade_count, totals.c.score_sum)
+            .outerjoin(totals, totals.c.student_id == User.id)
+            .where(*_course_students(course_id))
+            .order_by(User.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for full_name, email, count, score_sum in rows:
+            average = round(score_sum / count, 2) if count else 0
+            yield [full_name, email, total_assignments, count or 0, average]
+
+    elif layout == "grades":
+        yield ["Студент", "Email", "Задание", "Максимальный балл", "Оценка", "Комментарий", "Дата оценивания"]
+        rows = await db.stream(
+            select(
+                User.full_name, User.email, Assignment.title, Assignment.max_score,
+                Grade.score, Grade.comment, Grade.graded_at
+            )
+            .join(User, User.id == Grade.student_id)
+            .join(Assignment, Assignment.id == Grade.assignment_id)
+            .where(*_course_students(course_id), *_course_grades(course_id))
+            .order_by(Grade.student_id, Grade.assignment_id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for full_name, email, title, max_score, score, comment, graded_at in rows:
+            yield [full_name, email, title, max_score, score, comment or "", graded_at.isoformat() if graded_at else ""]
+
+    else:
+        stmt = select(Assignment.id, Assignment.title).order_by(Assignment.id)
+        if course_id is not None:
+            stmt = stmt.where(Assignment.course_id == course_id)
+        assignments = (await db.execute(stmt)).all()
+        columns = {assignment_id: index for index, (assignment_id, _) in enumerate(assignments)}
+        yield ["Студент", "Email"] + [title for _, title in assignments]
+        rows = await db.stream(
+            select(User.id, User.full_name, User.email, Grade.assignment_id, Grade.score)
+            .outerjoin(Grade, and_(Grade.student_id == User.id, *_course_grades(course_id)))
+            .where(*_course_students(course_id))
+            .order_by(User.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        current, scores = None, None
+        async for student_id, full_name, email, assignment_id, score in rows:
+            if current is None or current[0] != student_id:
+                if current is not None:
+                    yield [current[1], current[2]] + scores
+                current, scores = (student_id, full_name, email), [""] * len(assignments)
+            if assignment_id in columns:
+                scores[columns[assignment_id]] = score
+        if current is not None:
+            yield [current[1], current[2]] + scores
+
+
+@router.post("/jobs", response_model=ReportJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_report_job(
+    job_request: ReportJobRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_teacher: User = Depends(get_current_teacher)
+):
+    """Ставит построение отчета в очередь фоновых процессов (см. app.jobs)"""
+    await courses.require_course(db, job_request.course_id, current_teacher)
+    if job_request.kind == "export":
+        params = {"format": job_request.format, "layout": job_request.layout, "course_id": job_request.course_id}
+        extension = job_request.format
+        if extension == "xlsx" and importlib.util.find_spec("openpyxl") is None:
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail="Для выгрузки в XLSX требуется пакет openpyxl"
+            )
+    else:
+        if job_request.kind == "student_report" and job_request.student_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Для отчета по студенту нужен student_id"
+            )
+        params = {"course_id": job_request.course_id}
+        if job_request.kind == "student_report":
+            params["student_id"] = job_request.student_id
+        extension = "json"
+
+    data_versions, _ = await versions.current(db, jobs.DEPENDENCIES[job_request.kind])
+    try:
+        job = jobs.queue.submit(job_request.kind, params, extension, tuple(data_versions))
+    except jobs.QueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Очередь отчетов заполнена, повторите попытку позже",
+            headers={"Retry-After": "5"}
+        )
+    response.headers["Location"] = f"/api/reports/jobs/{job.id}"
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=ReportJob)
+async def get_report_job(job_id: str, current_teacher: User = Depends(get_current_teacher)):
+    return _job_response(_get_job(job_id))
+
+
+@router.delete("/jobs/{job_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_report_job(job_id: str, current_teacher: User = Depends(get_current_teacher)):
+    """Отменяет незавершенное задание или удаляет завершенное вместе с результатом"""
+    job = _get_job(job_id)
+    if job.status in jobs.PENDING:
+        jobs.queue.cancel(job)
+    else:
+        jobs.queue.remove(job)
+    return None
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_report_job_result(
+    job_id: str,
+    request: Request,
+    current_teacher: User = Depends(get_current_teacher)
+):
+    """Готовый отчет; файл задания не меняется, поэтому ETag - id задания"""
+    job = _get_job(job_id)
+    if job.status != jobs.DONE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Отчет не готов: задание в состоянии {job.status}"
+        )
+    headers = {
+        "ETag": f'"{job.id}"',
+        "Cache-Control": f"private, max-age={int(jobs.REPORT_JOBS_TTL)}",
+    }
+    if request.headers.get("if-none-match") in (headers["ETag"], f"W/{headers['ETag']}"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if job.extension != "json":
+        headers["Content-Disposition"] = f'attachment; filename="{job.filename}"'
+    return FileResponse(job.path, media_type=jobs.CONTENT_TYPES[job.extension], headers=headers)
+
+
+def _get_job(job_id: str):
+    job = jobs.queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Задание не найдено"
+        )
+    return job
+
+
+def _job_response(job) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "result_url": f"/api/reports/jobs/{job.id}/result" if job.status == jobs.DONE else None,
+    }
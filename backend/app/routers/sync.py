@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import get_db
+from app.models import Assignment, Change, Grade, User
+from app.schemas import AssignmentWithTeacher, GradeWithDetails, SyncResult
+from app.auth import get_current_user
+from app.utils.loading import loader_options
+from app.utils.pagination import MAX_PAGE_SIZE
+from app.utils import fast_json
+from app.utils.fast_json import fast_response, row_projection
+from app import changes
+
+router = APIRouter()
+
+
+@router.get("", response_model=SyncResult)
+async def sync(
+    since: Optional[int] = Query(None, ge=0, description="seq из предыдущего ответа; без него - полный снимок"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Оценки и задания, созданные, измененные или удаленные после since.
+
+    Вместо перезагрузки GET /api/grades/ и GET /api/assignments/ клиент хранит
+    seq из ответа и передает его в следующий запрос: ответ содержит только
+    изменения (не больше limit, остальные - при has_more). reset=true - полный
+    снимок: без since, если надгробия после since уже сжаты или since из
+    другой базы. Студент получает только свои оценки.
+    """
+    # Номер читается до данных: изменения, закоммиченные между запросами, придут повторно, но не потеряются
+    head, compacted = (await db.execute(changes.head_statement())).one()
+    # Сжатие могло удалить и последнюю строку журнала; номер при этом не уменьшается
+    compacted = compacted or 0
+    head = max(head or 0, compacted)
+    student_id = current_user.id if current_user.role == "student" else None
+
+    if since is None or since < compacted or since > head:
+        result = {
+            "seq": head,
+            "reset": True,
+            "has_more": False,
+            "grades": await _grades(db, student_id),
+            "assignments": await _assignments(db),
+            "deleted": {"grades": [], "assignments": []},
+        }
+        return fast_response(result) if fast_json.FAST_JSON else result
+
+    stmt = select(Change.seq, Change.entity, Change.entity_id, Change.deleted).where(
+        Change.seq > since, Change.seq <= head
+    )
+    if student_id is not None:
+        stmt = stmt.where(or_(Change.entity == changes.ASSIGNMENT, Change.student_id == student_id))
+    rows = (await db.execute(stmt.order_by(Change.seq).limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    live = {changes.GRADE: [], changes.ASSIGNMENT: []}
+    deleted = {changes.GRADE: [], changes.ASSIGNMENT: []}
+    for _, entity, entity_id, is_deleted in rows:
+        (deleted if is_deleted else live)[entity].append(entity_id)
+
+    result = {
+        "seq": rows[-1].seq if has_more else head,
+        "reset": False,
+        "has_more": has_more,
+        # Запись, удаленная после чтения номера, здесь пропускается - ее надгробие придет в следующий раз
+        "grades": await _grades(db, student_id, live[changes.GRADE]) if live[changes.GRADE] else [],
+        "assignments": await _assignments(db, live[changes.ASSIGNMENT]) if live[changes.ASSIGNMENT] else [],
+        "deleted": {"grades": deleted[changes.GRADE], "assignments": deleted[changes.ASSIGNMENT]},
+    }
+    return fast_response(result) if fast_json.FAST_JSON else result
+
+
+async def _grades(db: AsyncSession, student_id: int = None, ids: list = None) -> list:
+    if fast_json.FAST_JSON:
+        projection = row_projection(Grade, GradeWithDetails)
+        stmt = projection.select()
+    else:
+        stmt = select(Grade).options(*loader_options(Grade, GradeWithDetails))
+    if student_id is not None:
+        stmt = stmt.where(Grade.student_id == student_id)
+    if ids is not None:
+        stmt = stmt.where(Grade.id.in_(ids))
+    stmt = stmt.order_by(Grade.id)
+    if fast_json.FAST_JSON:
+        return [projection.build(row) for row in await db.execute(stmt)]
+    return (await db.scalars(stmt)).all()
+
+
+async def _assignments(db: AsyncSession, ids: list = None) -> list:
+    if fast_json.FAST_JSON:
+        projection = row_projection(Assignment, AssignmentWithTeacher)
+        stmt = projection.select()
+    else:
+        stmt = select(Assignment).options(*loader_options(Assignment, AssignmentWithTeacher))
+    if ids is not None:
+        stmt = stmt.where(Assignment.id.in_(ids))
+    stmt = stmt.order_by(Assignment.id)
+    if fast_json.FAST_JSON:
+        return [projection.build(row) for row in await db.execute(stmt)]
+    return (await db.scalars(stmt)).all()
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.database import get_db
 from app.models import User
 from app.schemas import User as UserSchema
 from app.auth import get_current_user
+from app.utils.pagination import MAX_PAGE_SIZE, paginate, parse_fields, projected_response
 
 router = APIRouter()
 
@@ -16,35 +18,53 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 @router.get("/", response_model=List[UserSchema])
 async def get_users(
+    request: Request,
+    response: Response,
     role: str = None,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(User)
+    columns = parse_fields(fields, User, UserSchema)
+    stmt = select(*[getattr(User, name) for name in columns]) if columns else select(User)
     
     if role:
-        query = query.filter(User.role == role)
+        stmt = stmt.where(User.role == role)
     
-    users = query.all()
+    users = await paginate(db, stmt, User.id, request, response, limit, after, rows=bool(columns))
+    if columns:
+        return projected_response(users, response)
     return users
 
 
 @router.get("/students", response_model=List[UserSchema])
 async def get_students(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    students = db.query(User).filter(User.role == "student").all()
+    columns = parse_fields(fields, User, UserSchema)
+    stmt = select(*[getattr(User, name) for name in columns]) if columns else select(User)
+    stmt = stmt.where(User.role == "student")
+    students = await paginate(db, stmt, User.id, request, response, limit, after, rows=bool(columns))
+    if columns:
+        return projected_response(students, response)
     return students
 
 
 @router.get("/{user_id}", response_model=UserSchema)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 
 class UserBase(BaseModel):
@@ -37,6 +37,9 @@ class AssignmentBase(BaseModel):
     description: Optional[str] = None
     max_score: float = Field(gt=0)
     deadline: Optional[datetime] = None
+    weight: float = Field(1.0, ge=0)
+    category: Optional[str] = None
+    course_id: Optional[int] = None
 
 
 class AssignmentCreate(AssignmentBase):
@@ -48,6 +51,9 @@ class AssignmentUpdate(BaseModel):
     description: Optional[str] = None
     max_score: Optional[float] = None
     deadline: Optional[datetime] = None
+    weight: Optional[float] = Field(None, ge=0)
+    category: Optional[str] = None
+    course_id: Optional[int] = None
 
 
 class Assignment(AssignmentBase):
@@ -63,6 +69,39 @@ class AssignmentWithTeacher(Assignment):
     teacher: User
 
 
+class CourseBase(BaseModel):
+    title: str
+    term: Optional[str] = None
+
+
+class CourseCreate(CourseBase):
+    pass
+
+
+class CourseUpdate(BaseModel):
+    title: Optional[str] = None
+    term: Optional[str] = None
+
+
+class Course(CourseBase):
+    id: int
+    created_by: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class EnrollmentRequest(BaseModel):
+    student_ids: List[int]
+
+
+class EnrollmentResult(BaseModel):
+    enrolled: int
+    already_enrolled: int
+    not_found: List[int]
+
+
 class GradeBase(BaseModel):
     assignment_id: int
     student_id: int
@@ -93,11 +132,55 @@ class GradeWithDetails(Grade):
     student: User
 
 
+class GradeBulkError(BaseModel):
+    row: int
+    detail: str
+
+
+class GradeBulkResult(BaseModel):
+    created: int
+    updated: int
+    errors: List[GradeBulkError]
+
+
+class MatrixStudent(BaseModel):
+    id: int
+    full_name: str
+    email: EmailStr
+
+    class Config:
+        from_attributes = True
+
+
+class MatrixAssignment(BaseModel):
+    id: int
+    title: str
+    max_score: float
+    weight: float
+    category: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class GradeMatrix(BaseModel):
+    students: List[MatrixStudent]
+    assignments: List[MatrixAssignment]
+    encoding: str
+    # encoding=json: строки по студентам, null - оценки нет
+    scores: Optional[List[List[Optional[float]]]] = None
+    # encoding=float32: base64 little-endian float32 построчно, NaN - оценки нет
+    data: Optional[str] = None
+
+
 class StudentReport(BaseModel):
     student: User
     total_assignments: int
     completed_assignments: int
     average_score: float
+    percentage: Optional[float] = None
+    letter_grade: Optional[str] = None
+    category_percentages: Dict[str, float] = Field(default_factory=dict)
     grades: List[GradeWithDetails]
 
 
@@ -105,4 +188,73 @@ class CourseReport(BaseModel):
     total_students: int
     total_assignments: int
     average_score: float
-    student_reports: List[StudentReport]
\ No newline at end of file
+    average_percentage: Optional[float] = None
+    student_reports: List[StudentReport]
+
+
+class DistributionStats(BaseModel):
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    percentiles: Dict[str, Optional[float]]
+
+
+class HistogramBucket(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+
+class AssignmentDistribution(BaseModel):
+    assignment: Assignment
+    count: int
+    scores: DistributionStats
+    normalized: DistributionStats
+    histogram: List[HistogramBucket]
+
+
+class AssignmentDistributions(BaseModel):
+    assignments: List[AssignmentDistribution]
+
+
+class ReportJobRequest(BaseModel):
+    kind: str = Field(pattern="^(course_report|student_report|export)$")
+    # course_report, student_report
+    course_id: Optional[int] = None
+    student_id: Optional[int] = None
+    # export
+    format: str = Field("csv", pattern="^(csv|xlsx)$")
+    layout: str = Field("summary", pattern="^(summary|grades|matrix)$")
+
+
+class ReportJob(BaseModel):
+    id: str
+    kind: str
+    params: Dict[str, object]
+    # queued, running, done, failed, cancelled
+    status: str
+    progress: float
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result_url: Optional[str] = None
+
+
+class SyncDeleted(BaseModel):
+    grades: List[int]
+    assignments: List[int]
+
+
+class SyncResult(BaseModel):
+    # Номер, с которым запрашивать следующую синхронизацию (since)
+    seq: int
+    # true - полный снимок: локальные данные клиента заменяются целиком
+    reset: bool
+    # Изменений больше limit: повторить запрос с новым seq
+    has_more: bool
+    grades: List[GradeWithDetails]
+    assignments: List[AssignmentWithTeacher]
+    deleted: SyncDeleted
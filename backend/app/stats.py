@@ -0,0 +1,350 @@
+"""Материализованная статистика по оценкам.
+
+Таблицы student_stats, assignment_stats и counters обновляются обработчиками
+записи в той же транзакции, что и сами оценки, поэтому отчеты читают готовые
+агрегаты вместо пересчета по таблице grades.
+
+Пересчет и проверка расхождений (схему создает python -m app.cli migrate):
+
+    python -m app.stats verify
+    python -m app.stats rebuild
+"""
+import argparse
+import asyncio
+import sys
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Assignment, AssignmentStats, Counter, Grade, StudentStats
+
+ASSIGNMENTS_COUNTER = "assignments"
+
+# Счетчики меняются SQL-выражениями; объекты в сессии синхронизировать не нужно
+NO_SYNC = {"synchronize_session": False}
+
+# Параметров в одном IN; SQLite до 3.32 ограничивает запрос 999 параметрами
+CHUNK = 500
+
+
+async def get_counter(db: AsyncSession, name: str) -> Optional[int]:
+    return await db.scalar(select(Counter.value).where(Counter.name == name))
+
+
+async def bump_counter(db: AsyncSession, name: str, delta: int = 1) -> None:
+    await bump_counters(db, [name], delta)
+
+
+async def bump_counters(db: AsyncSession, names: Iterable[str], delta: int = 1) -> None:
+    """Один UPDATE на CHUNK счетчиков; недостающие вставляются одним INSERT"""
+    names = list(dict.fromkeys(names))
+    for start in range(0, len(names), CHUNK):
+        chunk = names[start:start + CHUNK]
+        result = await db.execute(
+            update(Counter).where(Counter.name.in_(chunk)).values(value=Counter.value + delta),
+            execution_options=NO_SYNC
+        )
+        if result.rowcount == len(chunk):
+            continue
+        existing = set(await db.scalars(select(Counter.name).where(Counter.name.in_(chunk))))
+        await db.execute(insert(Counter), [{"name": name, "value": delta} for name in chunk if name not in existing])
+
+
+async def total_assignments(db: AsyncSession) -> int:
+    value = await get_counter(db, ASSIGNMENTS_COUNTER)
+    if value is None:
+        return await db.scalar(select(func.count(Assignment.id)))
+    return value
+
+
+async def grade_added(db: AsyncSession, student_id: int, assignment_id: int, score: float) -> None:
+    result = await db.execute(
+        update(StudentStats).where(StudentStats.student_id == student_id).values(
+            score_min=case(
+                (StudentStats.grade_count == 0, score),
+                (StudentStats.score_min > score, score),
+                else_=StudentStats.score_min
+            ),
+            score_max=case(
+                (StudentStats.grade_count == 0, score),
+                (StudentStats.score_max < score, score),
+                else_=StudentStats.score_max
+            ),
+            grade_count=StudentStats.grade_count + 1,
+            score_sum=StudentStats.score_sum + score,
+        ),
+        execution_options=NO_SYNC
+    )
+    if not result.rowcount:
+        db.add(StudentStats(
+            student_id=student_id,
+            grade_count=1,
+            score_sum=score,
+            score_min=score,
+            score_max=score
+        ))
+
+    result = await db.execute(
+        update(AssignmentStats).where(AssignmentStats.assignment_id == assignment_id).values(
+            grade_count=AssignmentStats.grade_count + 1,
+            score_sum=AssignmentStats.score_sum + score,
+            score_sq_sum=AssignmentStats.score_sq_sum + score * score,
+        ),
+        execution_options=NO_SYNC
+    )
+    if not result.rowcount:
+        db.add(AssignmentStats(
+            assignment_id=assignment_id,
+            grade_count=1,
+            score_sum=score,
+            score_sq_sum=score * score
+        ))
+    await db.flush()
+
+
+async def grade_removed(db: AsyncSession, student_id: int, assignment_id: int, score: float) -> None:
+    """Вызывается после db.delete(grade): min/max пересчитываются только на границе"""
+    await db.flush()
+    bounds = (await db.execute(
+        select(StudentStats.score_min, StudentStats.score_max).where(StudentStats.student_id == student_id)
+    )).first()
+    if bounds is not None:
+        score_min, score_max = bounds
+        boundary = score_min is None or score <= score_min or score >= score_max
+        await db.execute(
+            update(StudentStats).where(StudentStats.student_id == student_id).values(
+                grade_count=StudentStats.grade_count - 1,
+                score_sum=StudentStats.score_sum - score,
+            ),
+            execution_options=NO_SYNC
+        )
+        if boundary:
+            score_min, score_max = (await db.execute(
+                select(func.min(Grade.score), func.max(Grade.score)).where(Grade.student_id == student_id)
+            )).one()
+            await db.execute(
+                update(StudentStats).where(StudentStats.student_id == student_id).values(
+                    score_min=score_min,
+                    score_max=score_max,
+                ),
+                execution_options=NO_SYNC
+            )
+
+    await db.execute(
+        update(AssignmentStats).where(AssignmentStats.assignment_id == assignment_id).values(
+            grade_count=AssignmentStats.grade_count - 1,
+            score_sum=AssignmentStats.score_sum - score,
+            score_sq_sum=AssignmentStats.score_sq_sum - score * score,
+        ),
+        execution_options=NO_SYNC
+    )
+
+
+async def grade_changed(
+    db: AsyncSession, student_id: int, assignment_id: int, old_score: float, new_score: float
+) -> None:
+    if old_score == new_score:
+        return
+    await grade_removed(db, student_id, assignment_id, old_score)
+    await grade_added(db, student_id, assignment_id, new_score)
+
+
+async def assignment_added(db: AsyncSession) -> None:
+    await bump_counter(db, ASSIGNMENTS_COUNTER, 1)
+
+
+async def assignment_removed(db: AsyncSession, assignment_id: int, student_ids: Iterable[int]) -> None:
+    """Вызывается после удаления задания вместе с его оценками"""
+    # Статистика ссылается на задание - ее строка удаляется до того, как flush удалит само задание
+    await db.execute(delete(AssignmentStats).where(AssignmentStats.assignment_id == assignment_id))
+    await db.flush()
+    await refresh_students(db, student_ids)
+    await bump_counter(db, ASSIGNMENTS_COUNTER, -1)
+
+
+async def refresh_students(db: AsyncSession, student_ids: Iterable[int]) -> None:
+    """Пересчет статистики для набора студентов групповым запросом на каждые CHUNK студентов"""
+    student_ids = sorted(set(student_ids))
+    if not student_ids:
+        return
+    for start in range(0, len(student_ids), CHUNK):
+        chunk = student_ids[start:start + CHUNK]
+        await db.execute(
+            delete(StudentStats).where(StudentStats.student_id.in_(chunk)),
+            execution_options={"synchronize_session": "fetch"}
+        )
+        db.add_all([
+            StudentStats(
+                student_id=student_id,
+                grade_count=count,
+                score_sum=score_sum,
+                score_min=score_min,
+                score_max=score_max
+            )
+            for student_id, count, score_sum, score_min, score_max in await _student_aggregates(db, chunk)
+        ])
+    await db.flush()
+
+
+async def refresh_assignments(db: AsyncSession, assignment_ids: Iterable[int]) -> None:
+    assignment_ids = sorted(set(assignment_ids))
+    if not assignment_ids:
+        return
+    for start in range(0, len(assignment_ids), CHUNK):
+        chunk = assignment_ids[start:start + CHUNK]
+        await db.execute(
+            delete(AssignmentStats).where(AssignmentStats.assignment_id.in_(chunk)),
+            execution_options={"synchronize_session": "fetch"}
+        )
+        db.add_all([
+            AssignmentStats(
+                assignment_id=assignment_id,
+                grade_count=count,
+                score_sum=score_sum,
+                score_sq_sum=score_sq_sum
+            )
+            for assignment_id, count, score_sum, score_sq_sum in await _assignment_aggregates(db, chunk)
+        ])
+    await db.flush()
+
+
+async def _student_aggregates(db: AsyncSession, student_ids: Optional[Iterable[int]] = None):
+    stmt = select(
+        Grade.student_id,
+        func.count(Grade.id),
+        func.sum(Grade.score),
+        func.min(Grade.score),
+        func.max(Grade.score)
+    )
+    if student_ids is not None:
+        stmt = stmt.where(Grade.student_id.in_(student_ids))
+    return (await db.execute(stmt.group_by(Grade.student_id))).all()
+
+
+async def _assignment_aggregates(db: AsyncSession, assignment_ids: Optional[Iterable[int]] = None):
+    stmt = select(
+        Grade.assignment_id,
+        func.count(Grade.id),
+        func.sum(Grade.score),
+        func.sum(Grade.score * Grade.score)
+    )
+    if assignment_ids is not None:
+        stmt = stmt.where(Grade.assignment_id.in_(assignment_ids))
+    return (await db.execute(stmt.group_by(Grade.assignment_id))).all()
+
+
+async def rebuild(db: AsyncSession) -> None:
+    """Полный пересчет всех агрегатов из таблицы grades"""
+    await db.execute(delete(StudentStats), execution_options={"synchronize_session": "fetch"})
+    await db.execute(delete(AssignmentStats), execution_options={"synchronize_session": "fetch"})
+    await refresh_students(db, [row[0] for row in await _student_aggregates(db)])
+    await refresh_assignments(db, [row[0] for row in await _assignment_aggregates(db)])
+
+    await db.execute(
+        delete(Counter).where(Counter.name == ASSIGNMENTS_COUNTER),
+        execution_options={"synchronize_session": "fetch"}
+    )
+    db.add(Counter(name=ASSIGNMENTS_COUNTER, value=await db.scalar(select(func.count(Assignment.id)))))
+    await db.flush()
+
+
+async def verify(db: AsyncSession, tolerance: float = 1e-6) -> List[str]:
+    """Сравнение сохраненных агрегатов с пересчитанными; возвращает список расхождений"""
+    drift = []
+
+    def differs(stored, expected) -> bool:
+        if stored is None or expected is None:
+            return stored != expected
+        return abs(stored - expected) > tolerance
+
+    expected = {row[0]: tuple(row[1:]) for row in await _student_aggregates(db)}
+    stored = {
+        row[0]: tuple(row[1:]) for row in await db.execute(
+            select(
+                StudentStats.student_id, StudentStats.grade_count, StudentStats.score_sum,
+                StudentStats.score_min, StudentStats.score_max
+            ).where(StudentStats.grade_count > 0)
+        )
+    }
+    for student_id in sorted(expected.keys() | stored.keys()):
+        want = expected.get(student_id, (0, 0, None, None))
+        have = stored.get(student_id, (0, 0, None, None))
+        if any(differs(h, w) for h, w in zip(have, want)):
+            drift.append(f"student {student_id}: stored {have}, expected {want}")
+
+    expected = {row[0]: tuple(row[1:]) for row in await _assignment_aggregates(db)}
+    stored = {
+        row[0]: tuple(row[1:]) for row in await db.execute(
+            select(
+                AssignmentStats.assignment_id, AssignmentStats.grade_count,
+                AssignmentStats.score_sum, AssignmentStats.score_sq_sum
+            ).where(AssignmentStats.grade_count > 0)
+        )
+    }
+    for assignment_id in sorted(expected.keys() | stored.keys()):
+        want = expected.get(assignment_id, (0, 0, 0))
+        have = stored.get(assignment_id, (0, 0, 0))
+        if any(differs(h, w) for h, w in zip(have, want)):
+            drift.append(f"assignment {assignment_id}: stored {have}, expected {want}")
+
+    want = await db.scalar(select(func.count(Assignment.id)))
+    have = await get_counter(db, ASSIGNMENTS_COUNTER)
+    if have != want:
+        drift.append(f"counter {ASSIGNMENTS_COUNTER}: stored {have}, expected {want}")
+
+    return drift
+
+
+# Таблицы, которые читают verify и rebuild
+REQUIRED_TABLES = {"users", "assignments", "grades", "student_stats", "assignment_stats", "counters"}
+
+
+async def _missing_tables() -> set:
+    import os
+
+    from sqlalchemy import inspect
+
+    from app.database import engine
+
+    url = engine.url
+    # Подключение к несуществующему файлу SQLite создало бы пустую БД
+    if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:") \
+            and not os.path.exists(url.database):
+        return REQUIRED_TABLES
+    async with engine.connect() as conn:
+        tables = set(await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names()))
+    return REQUIRED_TABLES - tables
+
+
+async def _run(command: str) -> int:
+    from app.database import SessionLocal
+
+    # Схему создают только миграции: команда, запущенная не на той БД, не должна создавать пустую
+    missing = await _missing_tables()
+    if missing:
+        print(f"В БД нет таблиц: {', '.join(sorted(missing))}. Сначала примените миграции: python -m app.cli migrate",
+              file=sys.stderr)
+        return 2
+    async with SessionLocal() as db:
+        drift = await verify(db)
+        for line in drift:
+            print(line)
+        if command == "rebuild":
+            await rebuild(db)
+            await db.commit()
+            print(f"Статистика пересчитана, исправлено расхождений: {len(drift)}")
+            return 0
+        print(f"Расхождений: {len(drift)}")
+        return 1 if drift else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Проверка и пересчет статистики оценок")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args(argv)
+    return asyncio.run(_run(args.command))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Быстрый путь сериализации: словари из строк выборки вместо ORM-объектов.
+
+Для response_model FastAPI валидирует каждый ORM-объект через схему с
+from_attributes, что на больших списках занимает большую часть времени
+ответа. Здесь по схеме строится один SELECT нужных колонок (с join для
+вложенных схем), строки превращаются в словари в порядке полей схемы и
+сериализуются orjson. Байты ответа совпадают с обычным путем - это проверяет
+`python -m benchmarks.json_equivalence`.
+
+Путь включается явно: FAST_JSON=true; по умолчанию ответы собираются через
+response_model.
+"""
+import json
+import os
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+from types import UnionType
+from typing import Callable, Optional, Tuple, Type, Union, get_args, get_origin
+
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import aliased
+
+from app.utils.http_cache import VALIDATOR_HEADERS
+from app.utils.loading import nested_schema
+
+try:
+    import orjson
+except ImportError:  # без orjson - стандартный json с теми же настройками, что у JSONResponse
+    orjson = None
+
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+PASSTHROUGH_HEADERS = ("Link", "X-Next-Cursor") + VALIDATOR_HEADERS
+
+
+@dataclass(frozen=True)
+class RowProjection:
+    columns: Tuple
+    joins: Tuple
+    build: Callable
+
+    def select(self):
+        stmt = select(*self.columns)
+        for target, on in self.joins:
+            stmt = stmt.outerjoin(target, on)
+        return stmt
+
+
+@lru_cache(maxsize=None)
+def row_projection(model, schema: Type[BaseModel]) -> RowProjection:
+    """SELECT колонок для schema и функция строка -> словарь.
+
+    Вложенные схемы должны соответствовать связям many-to-one модели;
+    коллекции собираются вызывающим кодом отдельным запросом.
+    """
+    columns = []
+    joins = []
+    build = _plan(model, inspect(model), schema, columns, joins)
+    return RowProjection(tuple(columns), tuple(joins), build)
+
+
+def _plan(entity, mapper, schema: Type[BaseModel], columns: list, joins: list) -> Callable:
+    fields = []
+    for name, field in schema.model_fields.items():
+        nested = nested_schema(field.annotation)
+        if nested is not None:
+            relationship = mapper.relationships[name]
+            if relationship.uselist:
+                raise ValueError(f"{schema.__name__}.{name}: коллекции не поддерживаются")
+            target = aliased(relationship.mapper.class_)
+            joins.append((target, getattr(entity, name)))
+            fields.append((name, None, _plan(target, relationship.mapper, nested, columns, joins)))
+        else:
+            columns.append(getattr(entity, name))
+            fields.append((name, len(columns) - 1, _converter(field.annotation)))
+
+    def build(row):
+        result = {}
+        for name, index, convert in fields:
+            result[name] = convert(row) if index is None else convert(row[index])
+        # LEFT JOIN без пары - вложенного объекта нет
+        if all(value is None for value in result.values()):
+            return None
+        return result
+
+    return build
+
+
+def _converter(annotation) -> Callable:
+    """Приведение значения колонки к типу поля, как это делает валидация схемы"""
+    if get_origin(annotation) in (Union, UnionType):
+        arguments = [argument for argument in get_args(annotation) if argument is not type(None)]
+        annotation = arguments[0] if len(arguments) == 1 else None
+    if annotation is float:
+        return lambda value: None if value is None else float(value)
+    if annotation is int:
+        return lambda value: None if value is None else int(value)
+    return lambda value: value
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_isoformat
+    ).encode("utf-8")
+
+
+def _isoformat(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def fast_response(content, response: Optional[Response] = None) -> Response:
+    """Готовые данные в JSON-ответ с заголовками пагинации и валидаторами из response"""
+    headers = {}
+    if response is not None:
+        headers = {name: response.headers[name] for name in PASSTHROUGH_HEADERS if name in response.headers}
+    return Response(dumps(content), media_type="application/json", headers=headers)
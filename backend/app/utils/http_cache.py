@@ -0,0 +1,59 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import versions
+
+VALIDATOR_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    names: List[str],
+    scope: str = ""
+) -> Optional[Response]:
+    """ETag/Last-Modified по версиям данных; 304, если клиент уже видел эту версию.
+
+    Версии читаются до основного запроса: если данные изменятся между чтениями,
+    клиент получит старый ETag и просто перезапросит ответ позже. scope
+    различает ответы, зависящие от пользователя (например, оценки студента).
+    """
+    values, updated_at = await versions.current(db, names)
+    digest = hashlib.sha1(
+        f"{request.url.path}?{request.url.query}|{scope}|{values}".encode()
+    ).hexdigest()[:20]
+    headers = {"ETag": f'W/"{digest}"', "Cache-Control": "private, no-cache"}
+    if updated_at is not None:
+        last_modified = updated_at.astimezone(timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified.replace(microsecond=0), usegmt=True)
+    else:
+        last_modified = None
+
+    if _not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # Слабое сравнение: W/"x" и "x" совпадают
+        return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        # Заголовок точен до секунды, а счетчик - нет: вторая запись в ту же секунду дает тот же
+        # Last-Modified, поэтому 304 только если изменение не позже начала объявленной секунды
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
@@ -0,0 +1,43 @@
+from functools import lru_cache
+from types import UnionType
+from typing import Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+
+@lru_cache(maxsize=None)
+def loader_options(model, schema: Type[BaseModel]) -> Tuple:
+    """Опции eager-загрузки для сериализации model в schema.
+
+    Каждому вложенному полю схемы, совпадающему по имени со связью модели,
+    соответствует joinedload (many-to-one) или selectinload (коллекции),
+    рекурсивно для вложенных схем. Так ответ собирается без ленивых
+    загрузок на каждую строку.
+    """
+    mapper = inspect(model)
+    options = []
+    for name, field in schema.model_fields.items():
+        nested = nested_schema(field.annotation)
+        if nested is None or name not in mapper.relationships:
+            continue
+        relationship = mapper.relationships[name]
+        attribute = getattr(model, name)
+        loader = selectinload(attribute) if relationship.uselist else joinedload(attribute)
+        children = loader_options(relationship.mapper.class_, nested)
+        if children:
+            loader = loader.options(*children)
+        options.append(loader)
+    return tuple(options)
+
+
+def nested_schema(annotation) -> Optional[Type[BaseModel]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    if get_origin(annotation) in (list, tuple, set, Union, UnionType):
+        for argument in get_args(annotation):
+            nested = nested_schema(argument)
+            if nested is not None:
+                return nested
+    return None
@@ -0,0 +1,76 @@
+from fastapi import HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Type
+from app.utils.http_cache import VALIDATOR_HEADERS
+
+MAX_PAGE_SIZE = 1000
+
+PAGINATION_HEADERS = ("Link", "X-Next-Cursor")
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt,
+    id_column,
+    request: Request,
+    response: Response,
+    limit: Optional[int],
+    after: Optional[int],
+    rows: bool = False
+):
+    """Keyset-пагинация по возрастанию id.
+
+    Без limit возвращается весь список (прежнее поведение). Если есть
+    следующая страница, ее курсор передается в заголовках Link и X-Next-Cursor.
+    rows=True возвращает строки (для проекции по колонкам), иначе ORM-объекты.
+    """
+    if after is not None:
+        stmt = stmt.where(id_column > after)
+    stmt = stmt.order_by(id_column)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+
+    result = await db.execute(stmt)
+    items = result.all() if rows else result.scalars().all()
+
+    if limit is not None and len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1].id
+        next_url = request.url.include_query_params(after=next_cursor, limit=limit)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return items
+
+
+def parse_fields(fields: Optional[str], model, schema: Type[BaseModel]) -> Optional[List[str]]:
+    """Список колонок для проекции ?fields=a,b; id включается всегда"""
+    if not fields:
+        return None
+
+    columns = {column.key for column in inspect(model).column_attrs}
+    allowed = [name for name in schema.model_fields if name in columns]
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные поля: {', '.join(unknown)}. Доступны: {', '.join(allowed)}"
+        )
+
+    return ["id"] + [name for name in dict.fromkeys(requested) if name != "id"]
+
+
+def projected_response(rows, response: Response) -> JSONResponse:
+    headers = {
+        name: response.headers[name]
+        for name in PAGINATION_HEADERS + VALIDATOR_HEADERS if name in response.headers
+    }
+    return JSONResponse(
+        jsonable_encoder([dict(row._mapping) for row in rows]),
+        headers=headers
+    )
@@ -0,0 +1,177 @@
+"""Кэш сериализованных ответов (отчетов) с защитой от одновременных пересчетов.
+
+Ключ включает ETag, который вычисляется по версиям данных (app.versions),
+поэтому запись оценки, задания или пользователя меняет ключ, и старая запись
+просто перестает запрашиваться и вытесняется по LRU/TTL. Явная очистка
+при записи не нужна, и кэш корректен для нескольких воркеров с общим Redis.
+"""
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, Optional, Type
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.utils import fast_json
+from app.utils.cache import TTLCache
+from app.utils.http_cache import VALIDATOR_HEADERS
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "128"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class CacheBackend:
+    """Интерфейс хранилища: байты по строковому ключу"""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """LRU в памяти процесса; TTL задается при создании"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+class RedisBackend(CacheBackend):
+    """Любой клиент с асинхронными get/set(ex=)/delete в стиле redis.asyncio"""
+
+    def __init__(self, client, prefix: str = "gradebook:response:"):
+        self._client = client
+        self._prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self._client.get(self._prefix + key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(self._prefix + key, value, ex=max(1, int(ttl)))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self._prefix + key)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+class ResponseCache:
+    """Кэш поверх backend с single-flight: при промахе под нагрузкой
+    значение вычисляется один раз, остальные запросы ждут тот же результат."""
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float = RESPONSE_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get_or_set(self, key: str, compute: Callable[[], Awaitable[bytes]]) -> bytes:
+        if self.backend is None:
+            return await compute()
+
+        value = await self.backend.get(key)
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Отменен запрос, который считал значение, а не текущий - считаем сами
+                if not inflight.cancelled():
+                    raise
+                return await self.get_or_set(key, compute)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            await self.backend.set(key, value, self.ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже передано ожидающим; не оставляем его "неполученным"
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        if self.backend is None:
+            return {"backend": "off"}
+        return {**self.backend.stats(), "inflight": len(self._inflight)}
+
+
+def _make_backend() -> Optional[CacheBackend]:
+    if RESPONSE_CACHE_BACKEND == "off":
+        return None
+    if RESPONSE_CACHE_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("Для RESPONSE_CACHE_BACKEND=redis установите пакет redis")
+        return RedisBackend(redis.from_url(REDIS_URL))
+    return MemoryBackend(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+
+report_cache = ResponseCache(_make_backend())
+
+
+async def cached_json(
+    response: Response,
+    schema: Type[BaseModel],
+    build: Callable[[], Awaitable[dict]],
+    cache: ResponseCache = report_cache,
+    trusted: bool = False
+) -> Response:
+    """JSON-ответ по схеме из кэша; ключ - ETag, выставленный conditional_get.
+
+    Тело сериализуется так же, как это делает FastAPI для response_model.
+    trusted=True - build уже вернул словари в форме схемы (utils.fast_json),
+    повторная валидация пропускается.
+    """
+    headers = {name: response.headers[name] for name in VALIDATOR_HEADERS if name in response.headers}
+
+    async def render() -> bytes:
+        if trusted:
+            return fast_json.dumps(await build())
+        return JSONResponse(jsonable_encoder(schema.model_validate(await build()))).body
+
+    etag = headers.get("ETag")
+    body = await (cache.get_or_set(f"{schema.__name__}:{etag}", render) if etag else render())
+    return Response(body, media_type="application/json", headers=headers)
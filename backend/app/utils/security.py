@@ -1,22 +1,83 @@
 from fastapi import  HTTPException, status
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+
+from app.metrics import observe_password_hash
 
 SECRET_KEY = 'secretik'
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  
+# Роль в токене позволяет проверять доступ без запроса к БД, но смена роли
+# вступит в силу только после истечения выданных токенов.
+TOKEN_ROLE_CLAIM = os.getenv("TOKEN_ROLE_CLAIM", "false").lower() in ("1", "true", "yes")
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+
+
+@lru_cache(maxsize=None)
+def password_context():
+    """Создается при первой проверке пароля: passlib и bcrypt не нужны для импорта приложения.
+
+    min_rounds = max_rounds: хеши с другой стоимостью считаются устаревшими
+    и пересчитываются при следующем входе.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+        bcrypt__max_rounds=BCRYPT_ROUNDS,
+    )
+
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt отпускает GIL, поэтому достаточно пула потоков. Семафор ограничивает
+# число выполняемых и ожидающих задач; при переполнении отвечаем 429.
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_context().hash(password)
+
+
+async def _run_in_hash_pool(operation: str, func, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Сервер перегружен, повторите попытку позже",
+            headers={"Retry-After": "1"},
+        )
+    started = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(_hash_executor.submit(func, *args))
+    finally:
+        _hash_slots.release()
+        # Включает ожидание в очереди пула - именно его видит клиент
+        observe_password_hash(operation, time.perf_counter() - started)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool("hash", password_context().hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверка пароля в пуле; второй элемент - новый хеш, если стоимость устарела"""
+    return await _run_in_hash_pool("verify", password_context().verify_and_update, plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
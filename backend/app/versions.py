@@ -0,0 +1,45 @@
+"""Версии данных для HTTP-валидаторов (ETag / Last-Modified).
+
+Счетчики хранятся в таблице counters и увеличиваются обработчиками записи
+в той же транзакции, что и сами данные. Чтение ответа по версиям - один
+запрос по первичному ключу вместо выборки и сериализации.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Counter
+from app.stats import bump_counters
+
+GRADES = "version:grades"
+ASSIGNMENTS = "version:assignments"
+USERS = "version:users"
+COURSES = "version:courses"
+
+
+def student_grades(student_id: int) -> str:
+    return f"version:grades:student:{student_id}"
+
+
+async def bump(db: AsyncSession, *names: str) -> None:
+    await bump_counters(db, names)
+
+
+async def grades_changed(db: AsyncSession, student_ids: Iterable[int]) -> None:
+    """Оценки изменились: общая версия и версии затронутых студентов"""
+    await bump(db, GRADES, *(student_grades(student_id) for student_id in sorted(set(student_ids))))
+
+
+async def current(db: AsyncSession, names: List[str]) -> Tuple[List[int], Optional[datetime]]:
+    """Значения счетчиков в порядке names и время последнего изменения"""
+    rows = {
+        name: (value, updated_at)
+        for name, value, updated_at in await db.execute(
+            select(Counter.name, Counter.value, Counter.updated_at).where(Counter.name.in_(names))
+        )
+    }
+    values = [rows.get(name, (0, None))[0] for name in names]
+    changed = [updated_at for _, updated_at in rows.values() if updated_at is not None]
+    return values, max(changed) if changed else None
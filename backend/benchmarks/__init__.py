@@ -0,0 +1 @@
+"""Бенчмарки API; запускаются из директории backend как `python -m benchmarks.<скрипт>`."""
@@ -0,0 +1,92 @@
+"""Бенчмарк статистики по заданиям: время расчета и сверка с эталоном.
+
+Эталон - statistics и numpy.percentile по каждому заданию отдельно.
+Код возврата 1 при расхождении.
+
+    python -m benchmarks.assignment_stats --students 5000 --assignments 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+from benchmarks.seed import seed
+from sqlalchemy import select, update
+
+from app.database import SessionLocal, engine
+from app.models import Assignment, Grade
+from app.routers.reports import _build_assignment_distributions
+from app.schemas import AssignmentDistributions
+
+
+def _close(expected, actual, digits: int) -> bool:
+    if expected is None or actual is None:
+        return expected is actual
+    return abs(round(expected, digits) - actual) <= 10 ** -digits
+
+
+async def run(students: int, assignments: int, density: float, bins: int) -> int:
+    await seed(students, assignments, density)
+    async with SessionLocal() as db:
+        # Разные шкалы и дробные баллы, чтобы нормализация и интерполяция что-то проверяли
+        await db.execute(update(Assignment).where(Assignment.id % 2 == 0).values(max_score=40))
+        await db.execute(update(Grade).values(score=(Grade.id * 7919) % 4000 / 100.0))
+        await db.commit()
+
+    async with SessionLocal() as db:
+        started = time.perf_counter()
+        report = await _build_assignment_distributions(db, bins)
+        elapsed = time.perf_counter() - started
+        AssignmentDistributions.model_validate(report)
+
+        scores = defaultdict(list)
+        for assignment_id, score in await db.execute(select(Grade.assignment_id, Grade.score)):
+            scores[assignment_id].append(score)
+
+    failures = 0
+    for item in report["assignments"]:
+        values = scores.get(item["assignment"]["id"], [])
+        max_score = item["assignment"]["max_score"]
+        expected = {
+            "mean": statistics.fmean(values) if values else None,
+            "median": statistics.median(values) if values else None,
+            "std": statistics.pstdev(values) if values else None,
+            "min": min(values, default=None),
+            "max": max(values, default=None),
+        }
+        ok = item["count"] == len(values)
+        for name, value in expected.items():
+            ok &= _close(value, item["scores"][name], 2)
+            ok &= _close(None if value is None else value / max_score, item["normalized"][name], 4)
+        for key, value in item["scores"]["percentiles"].items():
+            ok &= _close(float(np.percentile(values, int(key[1:]))) if values else None, value, 2)
+        histogram = [0] * bins
+        for value in values:
+            histogram[min(int(value * bins / max_score), bins - 1)] += 1
+        ok &= [bucket["count"] for bucket in item["histogram"]] == histogram
+        failures += not ok
+        if not ok:
+            print(f"  FAIL задание {item['assignment']['id']}")
+
+    print(f"{'assignments':>12} {'grades':>10} {'seconds':>9}")
+    print(f"{assignments:>12} {sum(map(len, scores.values())):>10} {elapsed:>9.3f}")
+    print("сверка с эталоном:", "FAIL" if failures else "ok")
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--assignments", type=int, default=20)
+    parser.add_argument("--density", type=float, default=1.0)
+    parser.add_argument("--bins", type=int, default=10)
+    args = parser.parse_args()
+    return asyncio.run(run(args.students, args.assignments, args.density, args.bins))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
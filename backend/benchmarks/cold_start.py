@@ -0,0 +1,107 @@
+"""Холодный старт воркера: импорт приложения, startup и первый запрос.
+
+Каждый замер - отдельный процесс Python, как новый воркер uvicorn. Дополнительно
+проверяется, что импорт приложения не обращается к диску: в пустом рабочем
+каталоге не должны появиться ни база, ни каталог data/. Код возврата 1, если
+медиана любой фазы превышает бюджет или импорт создал файлы.
+
+    python -m benchmarks.cold_start --runs 5 --import-budget 1.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PHASES = ("import", "startup", "first_request")
+
+
+def child() -> None:
+    """Замер в отдельном процессе; результат - строка JSON в stdout"""
+    started = time.perf_counter()
+    import app.main
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+    from app.utils.security import create_access_token
+
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+    before_startup = time.perf_counter()
+    with TestClient(app.main.app) as client:
+        ready = time.perf_counter()
+        response = client.get("/api/assignments/", headers=headers)
+        answered = time.perf_counter()
+    print(json.dumps({
+        "import": imported - started,
+        "startup": ready - before_startup,
+        "first_request": answered - ready,
+        "status": response.status_code,
+    }))
+
+
+def _measure(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.cold_start", "--child"],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _import_is_pure() -> bool:
+    """Импорт без I/O: в пустом рабочем каталоге не появляется ни БД, ни каталогов data/"""
+    workdir = tempfile.mkdtemp(prefix="gradebook-cold-")
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    for name in ("DATABASE_URL", "DATABASE_READ_URL", "REPORT_JOBS_DIR"):
+        env.pop(name, None)
+    subprocess.run([sys.executable, "-c", "import app.main"], env=env, cwd=workdir, check=True)
+    return not os.listdir(workdir)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget", type=float, default=2.0, help="сек")
+    parser.add_argument("--startup-budget", type=float, default=0.05, help="сек")
+    parser.add_argument("--first-request-budget", type=float, default=0.5, help="сек")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return 0
+
+    from benchmarks.seed import seed
+
+    asyncio.run(seed(50, 10))
+    env = dict(os.environ)
+    runs = [_measure(env) for _ in range(args.runs)]
+    budgets = {
+        "import": args.import_budget,
+        "startup": args.startup_budget,
+        "first_request": args.first_request_budget,
+    }
+
+    failures = 0
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        median = statistics.median(values)
+        ok = median <= budgets[phase]
+        failures += not ok
+        print(f"  {'ok' if ok else 'FAIL':<4} {phase:<14} median {median * 1000:>7.1f} ms  "
+              f"max {max(values) * 1000:>7.1f} ms  budget {budgets[phase] * 1000:.0f} ms")
+    statuses = {run["status"] for run in runs}
+    if statuses != {200}:
+        failures += 1
+        print(f"  FAIL первый запрос: {sorted(statuses)}")
+
+    pure = _import_is_pure()
+    failures += not pure
+    print(f"  {'ok' if pure else 'FAIL':<4} импорт без обращения к диску")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
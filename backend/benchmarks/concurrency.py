@@ -0,0 +1,96 @@
+"""Нагрузочный тест: пропускная способность в зависимости от числа воркеров uvicorn.
+
+Запускает `uvicorn app.main:app --workers N` для каждого N на отдельной
+тестовой базе и отправляет запросы с заданной конкурентностью.
+
+    python -m benchmarks.concurrency --workers 1 2 4 --concurrency 32 --requests 500
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+PORT = 8765
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn не запустился")
+
+
+async def _drive(client: httpx.AsyncClient, path: str, token: str, total: int, concurrency: int) -> tuple:
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return total / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)], errors
+
+
+async def run(args) -> None:
+    from benchmarks.seed import seed
+    from app.utils.security import create_access_token
+
+    await seed(args.students, args.assignments)
+    token = create_access_token(data={"sub": "1"})
+    env = dict(os.environ)
+
+    print(f"{'workers':>8} {'path':<28} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT),
+             "--workers", str(workers), "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+                await _wait_ready(client)
+                for path in args.paths:
+                    await _drive(client, path, token, min(50, args.requests), args.concurrency)
+                    rps, p50, p95, errors = await _drive(client, path, token, args.requests, args.concurrency)
+                    print(f"{workers:>8} {path:<28} {rps:>9.1f} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {errors:>7}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--assignments", type=int, default=10)
+    parser.add_argument("--paths", nargs="+", default=["/api/grades/?limit=100", "/api/reports/course"])
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Бенчмарк отчета по курсу: число SQL-запросов и время в зависимости от числа студентов.
+
+Запуск из директории backend:
+
+    python -m benchmarks.course_report --students 10 100 1000 --assignments 10
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.seed import seed
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.routers.reports import _build_course_report
+from app.schemas import CourseReport
+
+
+async def measure() -> tuple:
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    started = time.perf_counter()
+    try:
+        async with SessionLocal() as db:
+            CourseReport.model_validate(await _build_course_report(db))
+    finally:
+        elapsed = time.perf_counter() - started
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    return len(statements), elapsed
+
+
+async def run(student_counts, assignments: int) -> None:
+    print(f"{'students':>10} {'grades':>10} {'queries':>8} {'seconds':>9}")
+    for students in student_counts:
+        await seed(students, assignments)
+        queries, elapsed = await measure()
+        print(f"{students:>10} {students * assignments:>10} {queries:>8} {elapsed:>9.3f}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--assignments", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.students, args.assignments))
+
+
+if __name__ == "__main__":
+    main()
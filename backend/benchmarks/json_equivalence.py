@@ -0,0 +1,95 @@
+"""Проверка быстрого пути JSON: ответы побайтно совпадают с обычным путем.
+
+Каждый эндпоинт запрашивается с FAST_JSON выключенным (валидация через
+response_model) и включенным (словари из строк + orjson, а также запасной
+вариант на стандартном json). Данные включают кириллицу, пустые комментарии
+и дедлайны, дробные оценки и оценки, сохраненные целыми числами.
+Код возврата 1 при любом расхождении.
+
+    python -m benchmarks.json_equivalence
+"""
+import asyncio
+import sys
+from datetime import datetime
+
+from benchmarks.seed import seed
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Assignment, Grade, User
+from app.utils import fast_json, response_cache
+from app.utils.security import create_access_token
+
+STUDENTS = 30
+ASSIGNMENTS = 6
+
+PATHS = [
+    ("/api/grades/", "teacher"),
+    ("/api/grades/", "student"),
+    ("/api/grades/?limit=7", "teacher"),
+    ("/api/grades/?limit=7&after=7", "teacher"),
+    ("/api/grades/?student_id=3", "teacher"),
+    ("/api/grades/?assignment_id=2", "teacher"),
+    ("/api/grades/matrix", "teacher"),
+    ("/api/grades/matrix?encoding=float32", "teacher"),
+    ("/api/assignments/", "student"),
+    ("/api/assignments/?limit=2", "teacher"),
+    ("/api/reports/course", "teacher"),
+    ("/api/reports/student/2", "teacher"),
+    ("/api/reports/student/5", "teacher"),
+    ("/api/reports/student/999", "teacher"),
+    ("/api/reports/assignments?bins=4", "teacher"),
+    ("/api/reports/assignment/1", "teacher"),
+    ("/api/reports/assignment/999", "teacher"),
+    ("/api/sync", "teacher"),
+    ("/api/sync", "student"),
+]
+
+
+async def prepare() -> None:
+    await seed(STUDENTS, ASSIGNMENTS, density=0.7)
+    async with SessionLocal() as db:
+        await db.execute(update(User).where(User.id == 2).values(full_name="Петров Пётр «Тест» \\ \"кавычки\""))
+        await db.execute(update(Assignment).where(Assignment.id == 1).values(
+            description="Описание с эмодзи 📚 и\nпереводом строки", deadline=datetime(2026, 1, 31, 23, 59, 59, 123456)
+        ))
+        await db.execute(update(Grade).where(Grade.id % 3 == 0).values(score=Grade.id + 0.25, comment="Хорошо"))
+        await db.execute(update(Grade).where(Grade.id % 5 == 0).values(graded_at=None))
+        await db.commit()
+
+
+def main() -> int:
+    from fastapi.testclient import TestClient
+
+    asyncio.run(prepare())
+    tokens = {
+        "teacher": create_access_token(data={"sub": "1"}),
+        "student": create_access_token(data={"sub": "2"}),
+    }
+    # Кэш отчетов общий для обоих путей (ключ - ETag), поэтому на время проверки выключен
+    response_cache.report_cache.backend = None
+    variants = {"orjson": fast_json.orjson, "json": None}
+    failures = 0
+
+    with TestClient(app) as client:
+        for path, role in PATHS:
+            headers = {"Authorization": f"Bearer {tokens[role]}"}
+            fast_json.FAST_JSON = False
+            expected = client.get(path, headers=headers)
+            for name, module in variants.items():
+                fast_json.FAST_JSON, fast_json.orjson = True, module
+                actual = client.get(path, headers=headers)
+                same = actual.status_code == expected.status_code and actual.content == expected.content
+                failures += not same
+                print(f"  {'ok  ' if same else 'FAIL'} {name:<6} {role:<8} {path:<32} "
+                      f"{expected.status_code} {len(expected.content)} bytes")
+                if not same:
+                    print(f"       expected: {expected.content[:200]!r}\n       actual:   {actual.content[:200]!r}")
+            fast_json.orjson = variants["orjson"]
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Проверка лимита частоты и допуска к тяжелым эндпоинтам.
+
+Приложение поднимается с маленькой корзиной (RATE_LIMIT_BURST=10,
+RATE_LIMIT_RATE=1) и одним слотом для тяжелых запросов без очереди:
+
+- после исчерпания корзины приходит 429 с Retry-After, а X-RateLimit-Remaining
+  убывает на стоимость маршрута;
+- корзины разных пользователей независимы, вход без токена считается по IP;
+- пока слот тяжелых запросов занят, отчет получает 503, а легкие запросы
+  проходят; после освобождения слота отчет снова выполняется.
+
+Код возврата 1 при любом несоответствии.
+
+    python -m benchmarks.rate_limit
+"""
+import asyncio
+import os
+import sys
+
+os.environ.update({
+    "RATE_LIMIT_ENABLED": "true",
+    "RATE_LIMIT_RATE": "1",
+    "RATE_LIMIT_BURST": "10",
+    "HEAVY_CONCURRENCY": "1",
+    "HEAVY_QUEUE": "0",
+})
+
+import httpx  # noqa: E402
+from benchmarks.seed import seed  # noqa: E402
+
+from app import ratelimit  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.security import create_access_token  # noqa: E402
+
+
+async def run() -> int:
+    await seed(20, 5)
+    failures = 0
+
+    def check(name: str, ok: bool, detail: str = "") -> None:
+        nonlocal failures
+        failures += not ok
+        print(f"  {'ok' if ok else 'FAIL':<4} {name} {detail}")
+
+    teacher = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+    student = {"Authorization": f"Bearer {create_access_token(data={'sub': '2'})}"}
+    transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        remaining = [
+            (await client.get("/api/assignments/", headers=teacher)).headers.get("x-ratelimit-remaining")
+            for _ in range(10)
+        ]
+        check("remaining убывает", remaining == [str(n) for n in range(9, -1, -1)], str(remaining))
+        response = await client.get("/api/assignments/", headers=teacher)
+        check("429 после исчерпания", response.status_code == 429, str(response.status_code))
+        check("Retry-After", response.headers.get("retry-after") == "1", str(response.headers.get("retry-after")))
+        check("служебные пути без лимита", (await client.get("/health")).status_code == 200)
+
+        response = await client.get("/api/assignments/", headers=student)
+        check("корзина другого пользователя", response.status_code == 200, str(response.status_code))
+
+        credentials = {"email": "nobody@example.com", "password": "wrong"}
+        first = await client.post("/api/auth/login", json=credentials)
+        second = await client.post("/api/auth/login", json=credentials)
+        check("вход по IP стоит 10 токенов", (first.status_code, second.status_code) == (401, 429),
+              f"{first.status_code} {second.status_code}")
+        check("Retry-After входа", second.headers.get("retry-after") == "10", str(second.headers.get("retry-after")))
+
+        # Слот занят "другим" отчетом: без очереди новый тяжелый запрос сразу получает 503
+        ratelimit.limiter_store._buckets.clear()
+        await ratelimit.heavy_gate.acquire()
+        response = await client.get("/api/reports/course", headers=teacher)
+        check("отчет при занятом слоте - 503", response.status_code == 503, str(response.status_code))
+        check("Retry-After перегрузки", "retry-after" in response.headers)
+        response = await client.get("/api/assignments/", headers=student)
+        check("легкий запрос при занятом слоте", response.status_code == 200, str(response.status_code))
+        ratelimit.heavy_gate.release()
+
+        response = await client.get("/api/reports/course", headers=teacher)
+        check("отчет после освобождения", response.status_code == 200, str(response.status_code))
+        check("слот освобожден", ratelimit.heavy_gate.active == 0, str(ratelimit.heavy_gate.stats()))
+    return 1 if failures else 0
+
+
+def main() -> int:
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
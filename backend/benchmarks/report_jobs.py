@@ -0,0 +1,218 @@
+"""Проверка фоновых заданий на отчеты (app.jobs).
+
+С одним процессом в пуле и очередью на 3 задания проверяется:
+результат задания побайтно совпадает с синхронным эндпоинтом (отчет по
+курсу и выгрузка CSV), выгрузка с course_id совпадает с отчетом по тому же
+курсу, одинаковые задания объединяются, а после изменения
+данных ставится новое, переполненная очередь отвечает 503, задание в
+очереди отменяется, ошибка построения попадает в error, готовый результат
+отдается с ETag и 304. Другой воркер (отдельный JobQueue) по манифестам
+отдает статус и результат, отменяет и удаляет чужие задания. Печатает время ответа POST против синхронного
+отчета. Код возврата 1 при любом несоответствии.
+
+    python -m benchmarks.report_jobs --students 1000 --assignments 20
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+import sys
+import time
+
+os.environ.setdefault("REPORT_JOB_WORKERS", "1")
+os.environ.setdefault("REPORT_JOBS_QUEUE", "3")
+
+import httpx  # noqa: E402
+from benchmarks.seed import seed  # noqa: E402
+
+from app import jobs  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.security import create_access_token  # noqa: E402
+
+
+async def wait(client, job_id: str, headers: dict, timeout: float = 120) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = (await client.get(f"/api/reports/jobs/{job_id}", headers=headers)).json()
+        if job["status"] not in jobs.PENDING or time.monotonic() > deadline:
+            return job
+        await asyncio.sleep(0.05)
+
+
+async def run(students: int, assignments: int) -> int:
+    await seed(students, assignments)
+    failures = 0
+
+    def check(name: str, ok: bool, detail: str = "") -> None:
+        nonlocal failures
+        failures += not ok
+        print(f"  {'ok' if ok else 'FAIL':<4} {name} {detail}")
+
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        started = time.perf_counter()
+        response = await client.post("/api/reports/jobs", json={"kind": "course_report"}, headers=headers)
+        post_ms = (time.perf_counter() - started) * 1000
+        course_job = response.json()
+        location = response.headers.get("location")
+        check("POST 202 и Location", response.status_code == 202
+              and location == f"/api/reports/jobs/{course_job['id']}", str(response.status_code))
+
+        again = (await client.post("/api/reports/jobs", json={"kind": "course_report"}, headers=headers)).json()
+        check("одинаковое задание объединено", again["id"] == course_job["id"])
+
+        queued = [
+            (await client.post("/api/reports/jobs", json={"kind": "student_report", "student_id": student_id},
+                               headers=headers))
+            for student_id in (2, 3, 4)
+        ]
+        check("переполненная очередь - 503", [r.status_code for r in queued] == [202, 202, 503],
+              str([r.status_code for r in queued]))
+        cancelled_id = queued[1].json()["id"]
+        response = await client.delete(f"/api/reports/jobs/{cancelled_id}", headers=headers)
+        check("отмена задания в очереди", response.status_code == 204, str(response.status_code))
+
+        course_job = await wait(client, course_job["id"], headers)
+        check("отчет по курсу готов", course_job["status"] == "done" and course_job["progress"] == 1.0,
+              str(course_job))
+        student_job = await wait(client, queued[0].json()["id"], headers)
+        check("отчет по студенту готов", student_job["status"] == "done", student_job["status"])
+        cancelled = (await client.get(f"/api/reports/jobs/{cancelled_id}", headers=headers)).json()
+        check("отмененное не выполнялось", cancelled["status"] == "cancelled" and cancelled["started_at"] is None,
+              str(cancelled))
+
+        started = time.perf_counter()
+        inline = await client.get("/api/reports/course", headers=headers)
+        inline_ms = (time.perf_counter() - started) * 1000
+        result = await client.get(course_job["result_url"], headers=headers)
+        check("результат совпадает с /api/reports/course", result.content == inline.content,
+              f"{len(result.content)} / {len(inline.content)} bytes")
+        cached = await client.get(course_job["result_url"], headers={**headers, "If-None-Match": result.headers["etag"]})
+        check("304 по ETag", cached.status_code == 304, str(cached.status_code))
+
+        response = await client.post("/api/reports/jobs", json={"kind": "export", "layout": "grades"}, headers=headers)
+        export_job = await wait(client, response.json()["id"], headers)
+        export = await client.get(export_job["result_url"], headers=headers)
+        inline_export = await client.get("/api/reports/course/export?layout=grades", headers=headers)
+        check("выгрузка совпадает с /course/export", export.content == inline_export.content,
+              f"{len(export.content)} / {len(inline_export.content)} bytes")
+
+        await check_course_export(client, headers, check)
+        await check_other_worker(client, headers, check, course_job)
+
+        response = await client.post("/api/reports/jobs", json={"kind": "student_report", "student_id": 999999},
+                                     headers=headers)
+        failed = await wait(client, response.json()["id"], headers)
+        check("ошибка в error", failed["status"] == "failed" and failed["error"] == "Студент не найден", str(failed))
+        response = await client.get(f"/api/reports/jobs/{failed['id']}/result", headers=headers)
+        check("результата нет - 409", response.status_code == 409, str(response.status_code))
+
+        await client.put("/api/grades/1", json={"score": 1}, headers=headers)
+        renewed = (await client.post("/api/reports/jobs", json={"kind": "course_report"}, headers=headers)).json()
+        check("после изменения данных - новое задание", renewed["id"] != course_job["id"])
+        await wait(client, renewed["id"], headers)
+
+        response = await client.delete(f"/api/reports/jobs/{course_job['id']}", headers=headers)
+        gone = await client.get(f"/api/reports/jobs/{course_job['id']}", headers=headers)
+        check("удаление готового задания", response.status_code == 204 and gone.status_code == 404
+              and not os.path.exists(os.path.join(jobs.REPORT_JOBS_DIR, f"{course_job['id']}.json")))
+
+    print(f"{students} students x {assignments} assignments: POST /api/reports/jobs {post_ms:.1f} ms, "
+          f"GET /api/reports/course {inline_ms:.1f} ms")
+    jobs.queue.shutdown()
+    return 1 if failures else 0
+
+
+async def check_course_export(client, headers: dict, check) -> None:
+    """Выгрузка по курсу: студенты и задания курса, итоги как в /api/reports/course?course_id="""
+    course_id = (await client.post("/api/courses/", json={"title": "Экспорт"}, headers=headers)).json()["id"]
+    for assignment_id in (1, 2):
+        await client.put(f"/api/assignments/{assignment_id}", json={"course_id": course_id}, headers=headers)
+    await client.post(f"/api/courses/{course_id}/enrollments", json={"student_ids": [2, 3, 4]}, headers=headers)
+
+    def rows(response) -> list:
+        return list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))[1:]
+
+    def export(layout: str):
+        return client.get(f"/api/reports/course/export?layout={layout}&course_id={course_id}", headers=headers)
+
+    report = (await client.get(f"/api/reports/course?course_id={course_id}", headers=headers)).json()
+    expected = [
+        [item["student"]["full_name"], item["student"]["email"], item["total_assignments"],
+         item["completed_assignments"], item["average_score"]]
+        for item in report["student_reports"]
+    ]
+    summary = [[name, email, int(total), int(count), float(average)] for name, email, total, count, average
+               in rows(await export("summary"))]
+    check("выгрузка по курсу совпадает с отчетом", summary == expected, f"{len(summary)} строк")
+
+    grades = rows(await export("grades"))
+    check("оценки только курса", len(grades) == sum(item["completed_assignments"] for item in report["student_reports"])
+          and {row[2] for row in grades} <= {item["assignment"]["title"] for r in report["student_reports"]
+                                             for item in r["grades"]}, f"{len(grades)} строк")
+    matrix = await export("matrix")
+    check("ведомость курса", len(rows(matrix)) == 3 and all(len(row) == 4 for row in rows(matrix)))
+
+    response = await client.post("/api/reports/jobs", json={
+        "kind": "export", "layout": "matrix", "course_id": course_id
+    }, headers=headers)
+    job = await wait(client, response.json()["id"], headers)
+    result = await client.get(job["result_url"], headers=headers) if job["result_url"] else None
+    check("задание выгрузки по курсу совпадает с /course/export", result is not None
+          and result.content == matrix.content and f"course_{course_id}_report_matrix" in
+          result.headers.get("content-disposition", ""), job["status"])
+
+    response = await client.get("/api/reports/course/export?course_id=999999", headers=headers)
+    check("выгрузка несуществующего курса - 404", response.status_code == 404, str(response.status_code))
+
+
+async def check_other_worker(client, headers: dict, check, done_job: dict) -> None:
+    """Запросы, попавшие в другой воркер uvicorn: у него свой JobQueue, общий только REPORT_JOBS_DIR"""
+    owner, other = jobs.queue, jobs.JobQueue()
+    submitted = [
+        (await client.post("/api/reports/jobs", json={"kind": "student_report", "student_id": student_id},
+                           headers=headers)).json()
+        for student_id in (5, 6)
+    ]
+    jobs.queue = other
+    try:
+        status = (await client.get(f"/api/reports/jobs/{done_job['id']}", headers=headers)).json()
+        check("другой воркер: статус по манифесту", status == done_job, str(status)[:200])
+        result = await client.get(done_job["result_url"], headers=headers)
+        check("другой воркер: результат", result.status_code == 200 and result.headers["etag"] == f'"{done_job["id"]}"',
+              str(result.status_code))
+        response = await client.delete(f"/api/reports/jobs/{submitted[1]['id']}", headers=headers)
+        check("другой воркер: отмена", response.status_code == 204, str(response.status_code))
+        # Путь, который через .. ведет к тому же манифесту, не принимается как id
+        escaped = f"../{os.path.basename(os.path.normpath(jobs.REPORT_JOBS_DIR))}/{done_job['id']}"
+        check("id только формата uuid4().hex", other.get(escaped) is None and other.get(done_job["id"]) is not None)
+    finally:
+        jobs.queue = owner
+
+    finished = await wait(client, submitted[0]["id"], headers)
+    cancelled = await wait(client, submitted[1]["id"], headers)
+    check("отмена видна принявшему воркеру", finished["status"] == "done" and cancelled["status"] == "cancelled"
+          and not os.path.exists(os.path.join(jobs.REPORT_JOBS_DIR, f"{cancelled['id']}.json")), cancelled["status"])
+
+    jobs.queue = other
+    try:
+        response = await client.delete(f"/api/reports/jobs/{finished['id']}", headers=headers)
+    finally:
+        jobs.queue = owner
+    gone = await client.get(f"/api/reports/jobs/{finished['id']}", headers=headers)
+    check("удаление через другой воркер", response.status_code == 204 and gone.status_code == 404,
+          str(gone.status_code))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--assignments", type=int, default=10)
+    args = parser.parse_args()
+    return asyncio.run(run(args.students, args.assignments))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
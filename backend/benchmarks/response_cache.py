@@ -0,0 +1,124 @@
+"""Проверка кэша отчетов с RedisBackend на локальной подделке Redis.
+
+FakeRedis повторяет нужную часть redis.asyncio: get, set с ex (целое число
+секунд > 0, иначе ошибка, как у Redis) и delete; время берется из
+управляемых часов, поэтому истечение TTL проверяется без ожидания.
+Проверяется:
+
+- get/set/delete через RedisBackend с префиксом ключей, счетчики hits/misses;
+- TTL: запись исчезает после истечения, дробный и нулевой TTL округляются
+  до допустимого ex;
+- single-flight в ResponseCache: одновременные промахи по одному ключу
+  вычисляют значение один раз, ошибка доходит до всех ожидающих и не
+  кэшируется, отмена вычисляющего запроса не ломает ожидающих.
+
+Код возврата 1 при любом несоответствии.
+
+    python -m benchmarks.response_cache
+"""
+import asyncio
+import sys
+from typing import Dict, Optional, Tuple
+
+from app.utils.response_cache import RedisBackend, ResponseCache
+
+
+class FakeRedis:
+    """Словарь в памяти с TTL по управляемым часам; API как у redis.asyncio.Redis"""
+
+    def __init__(self):
+        self.now = 0.0
+        # ключ -> (значение, момент истечения)
+        self.data: Dict[str, Tuple[bytes, float]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value, expires = self.data.get(key, (None, 0.0))
+        if value is not None and expires <= self.now:
+            del self.data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        if ex is not None and (not isinstance(ex, int) or ex <= 0):
+            raise ValueError("invalid expire time in 'set' command")
+        self.data[key] = (value, self.now + ex if ex is not None else float("inf"))
+        return True
+
+    async def delete(self, key: str) -> int:
+        return 1 if self.data.pop(key, None) is not None else 0
+
+
+async def run() -> int:
+    failures = 0
+
+    def check(name: str, ok: bool, detail: str = "") -> None:
+        nonlocal failures
+        failures += not ok
+        print(f"  {'ok' if ok else 'FAIL':<4} {name} {detail}")
+
+    redis = FakeRedis()
+    backend = RedisBackend(redis, prefix="test:")
+
+    check("промах", await backend.get("a") is None)
+    await backend.set("a", b"1", 10)
+    check("set/get", await backend.get("a") == b"1")
+    check("ключи с префиксом", set(redis.data) == {"test:a"}, str(set(redis.data)))
+    redis.now = 9.5
+    check("до истечения TTL", await backend.get("a") == b"1")
+    redis.now = 10
+    check("после истечения TTL", await backend.get("a") is None)
+
+    await backend.set("b", b"2", 0.2)
+    check("TTL меньше секунды округляется до ex=1", redis.data["test:b"][1] == redis.now + 1)
+    await backend.set("b", b"2", 2.7)
+    check("дробный TTL - целый ex", redis.data["test:b"][1] == redis.now + 2)
+    await backend.delete("b")
+    check("delete", await backend.get("b") is None)
+    check("счетчики", backend.stats() == {"backend": "redis", "hits": 2, "misses": 3}, str(backend.stats()))
+
+    cache = ResponseCache(backend, ttl=30)
+    calls = 0
+
+    async def compute() -> bytes:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return b"report"
+
+    results = await asyncio.gather(*(cache.get_or_set("report", compute) for _ in range(20)))
+    check("single-flight: одно вычисление на 20 промахов", calls == 1 and set(results) == {b"report"}, str(calls))
+    check("значение сохранено с TTL", redis.data["test:report"][1] == redis.now + 30)
+    check("повторный запрос из Redis", await cache.get_or_set("report", compute) == b"report" and calls == 1)
+    check("нет незавершенных вычислений", cache.stats()["inflight"] == 0)
+
+    async def failing() -> bytes:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    calls = 0
+    results = await asyncio.gather(*(cache.get_or_set("broken", failing) for _ in range(5)), return_exceptions=True)
+    check("ошибка доходит до всех ожидающих", calls == 1
+          and all(isinstance(result, RuntimeError) for result in results), str(results[:2]))
+    check("ошибка не кэшируется", "test:broken" not in redis.data)
+
+    calls = 0
+    leader = asyncio.create_task(cache.get_or_set("cancel", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_set("cancel", compute))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    value = await follower
+    check("отмена вычисляющего: ожидающий считает сам", value == b"report" and calls == 2 and leader.cancelled(),
+          str(calls))
+
+    return 1 if failures else 0
+
+
+def main() -> int:
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
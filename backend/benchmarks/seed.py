@@ -0,0 +1,93 @@
+"""Быстрое заполнение синтетического журнала для бенчмарков.
+
+В отличие от init_db строки вставляются пачками через executemany, а хеш
+пароля считается один раз на всех пользователей. Если DATABASE_URL не задан,
+используется временная база, чтобы не затронуть data/gradebook.db.
+Лимит частоты запросов выключается, если RATE_LIMIT_ENABLED не задан явно.
+"""
+import os
+import tempfile
+from datetime import datetime
+
+_tmpdir = tempfile.mkdtemp(prefix="gradebook-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}")
+# Бенчмарки гоняют сотни запросов от одного пользователя - лимит частоты мерил бы сам себя
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import stats  # noqa: E402
+from app.database import Base, DATABASE_URL, SessionLocal, make_engine  # noqa: E402
+from app.models import Assignment, Grade, User  # noqa: E402
+
+TEACHER_ID = 1
+FIRST_STUDENT_ID = 2
+PASSWORD = "bench123"
+
+
+def is_graded(student: int, assignment: int, density: float) -> bool:
+    """Детерминированный выбор пар студент/задание, у которых уже есть оценка"""
+    return (student * 31 + assignment * 17) % 100 < density * 100
+
+
+def free_pairs(students: int, assignments: int, density: float):
+    """Пары (assignment_id, student_id) без оценки - для сценариев создания"""
+    return [
+        (a + 1, i + FIRST_STUDENT_ID)
+        for i in range(students) for a in range(assignments)
+        if not is_graded(i, a, density)
+    ]
+
+
+async def seed(students: int, assignments: int, density: float = 1.0, password_hash: str = "-") -> None:
+    """Пересоздает схему и заполняет ее: преподаватель с id 1, студенты с id 2..
+
+    density - доля пар студент/задание, у которых есть оценка. Для сценариев
+    со входом передайте настоящий password_hash (пароль PASSWORD).
+    """
+    # Отдельный движок: seed может вызываться из другого event loop, чем приложение
+    seed_engine = make_engine(DATABASE_URL)
+    now = datetime.now()
+    try:
+        async with seed_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(User), [{
+                "id": TEACHER_ID,
+                "email": "teacher@example.com",
+                "password_hash": password_hash,
+                "full_name": "Teacher",
+                "role": "teacher",
+                "created_at": now,
+            }] + [{
+                "id": i + FIRST_STUDENT_ID,
+                "email": f"student{i}@example.com",
+                "password_hash": password_hash,
+                "full_name": f"Student {i}",
+                "role": "student",
+                "created_at": now,
+            } for i in range(students)])
+            await conn.execute(insert(Assignment), [{
+                "id": a + 1,
+                "title": f"Assignment {a}",
+                "max_score": 100,
+                "created_by": TEACHER_ID,
+                "created_at": now,
+            } for a in range(assignments)])
+            grades = [{
+                "assignment_id": a + 1,
+                "student_id": i + FIRST_STUDENT_ID,
+                "score": (i * 7 + a * 13) % 101,
+                "submitted_at": now,
+                "graded_at": now,
+            } for i in range(students) for a in range(assignments) if is_graded(i, a, density)]
+            if grades:
+                await conn.execute(insert(Grade), grades)
+
+        async with seed_engine.connect() as conn:
+            async with SessionLocal(bind=conn) as db:
+                await stats.rebuild(db)
+                await db.commit()
+            await conn.commit()
+    finally:
+        await seed_engine.dispose()
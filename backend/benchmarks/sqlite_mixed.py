@@ -0,0 +1,108 @@
+"""Смешанная нагрузка чтение/запись на SQLite: профиль PRAGMA до и после.
+
+Читатели запрашивают отчеты по студентам и страницы оценок, писатели одновременно
+меняют оценки. Каждый профиль (off - настройки драйвера по умолчанию,
+tuned - WAL и PRAGMA из app.database) запускается в отдельном процессе на
+своей базе, потому что профиль применяется при импорте приложения.
+
+    python -m benchmarks.sqlite_mixed --duration 10 --readers 8 --writers 2
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+PROFILES = ["off", "tuned"]
+
+
+async def _run_profile(args) -> None:
+    import httpx
+
+    from benchmarks.seed import seed
+    from app.database import engine, read_engine
+    from app.main import app
+    from app.utils.security import create_access_token
+
+    await seed(args.students, args.assignments)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+    grade_count = args.students * args.assignments
+    results = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    deadline = time.monotonic() + args.duration
+
+    async def reader(client):
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            if random.random() < 0.5:
+                path = f"/api/reports/student/{random.randint(2, args.students + 1)}"
+            else:
+                path = f"/api/grades/?limit=50&after={random.randint(0, grade_count - 50)}"
+            response = await client.get(path, headers=headers)
+            results["read"].append(time.perf_counter() - started)
+            errors["read"] += response.status_code != 200
+
+    async def writer(client):
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = await client.put(
+                f"/api/grades/{random.randint(1, grade_count)}",
+                json={"score": random.randint(0, 100)},
+                headers=headers
+            )
+            results["write"].append(time.perf_counter() - started)
+            errors["write"] += response.status_code != 200
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(reader(client) for _ in range(args.readers)),
+            *(writer(client) for _ in range(args.writers))
+        )
+        elapsed = time.perf_counter() - started
+
+    for kind in ("read", "write"):
+        latencies = sorted(results[kind]) or [0.0]
+        print(f"{os.environ['SQLITE_PROFILE']:>8} {kind:>6} {len(results[kind]) / elapsed:>9.1f} "
+              f"{latencies[len(latencies) // 2] * 1000:>8.1f} "
+              f"{latencies[int(len(latencies) * 0.95)] * 1000:>8.1f} {errors[kind]:>7}")
+
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", choices=PROFILES)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--assignments", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.profile:
+        asyncio.run(_run_profile(args))
+        return
+
+    print(f"{'profile':>8} {'kind':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}", flush=True)
+    for profile in PROFILES:
+        env = dict(
+            os.environ,
+            SQLITE_PROFILE=profile,
+            DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'mixed.db')}"
+        )
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite_mixed", "--profile", profile] + sys.argv[1:],
+            env=env,
+            check=True
+        )
+
+
+if __name__ == "__main__":
+    main()
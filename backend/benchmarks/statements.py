@@ -0,0 +1,99 @@
+"""Контроль числа SQL-запросов на эндпоинт.
+
+Для каждого эндпоинта задан бюджет запросов; он проверяется на двух
+размерах данных, чтобы ловить N+1 (число запросов не должно расти вместе
+с числом строк), и для обоих путей сериализации: через response_model и
+быстрого (FAST_JSON). Код возврата 1 при превышении бюджета.
+
+    python -m benchmarks.statements
+"""
+import asyncio
+import os
+import sys
+from contextlib import contextmanager
+
+# Кэш отчетов выключен: после повторного seed версии данных, а значит ETag и ключи кэша
+# повторяются, и отчеты отдавались бы из кэша без единого запроса к БД
+os.environ["RESPONSE_CACHE_BACKEND"] = "off"
+
+from benchmarks.seed import seed  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import engine, read_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils import fast_json  # noqa: E402
+from app.utils.security import create_access_token  # noqa: E402
+
+TEACHER_ID = 1
+STUDENT_ID = 2
+
+# (путь, роль, максимальное число запросов с учетом проверки токена и чтения версий для ETag)
+BUDGETS = [
+    ("/api/grades/", "teacher", 3),
+    ("/api/grades/", "student", 3),
+    ("/api/grades/?limit=50", "teacher", 3),
+    ("/api/grades/?fields=score", "teacher", 3),
+    ("/api/grades/matrix", "teacher", 4),
+    ("/api/grades/matrix?encoding=float32", "teacher", 4),
+    ("/api/grades/1", "teacher", 2),
+    ("/api/assignments/", "teacher", 3),
+    ("/api/assignments/1", "teacher", 2),
+    ("/api/users/", "teacher", 2),
+    ("/api/users/students", "teacher", 2),
+    ("/api/reports/student/2", "teacher", 7),
+    ("/api/reports/course", "teacher", 7),
+    ("/api/reports/assignments", "teacher", 4),
+    ("/api/reports/assignment/1", "teacher", 4),
+    ("/api/sync", "teacher", 4),
+    ("/api/sync", "student", 4),
+]
+
+SIZES = [(10, 5), (200, 20)]
+
+
+@contextmanager
+def count_statements(binds=None):
+    """Запросы через оба пула: основной и только для чтения"""
+    binds = binds or {engine.sync_engine, read_engine.sync_engine}
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for bind in binds:
+        event.listen(bind, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for bind in binds:
+            event.remove(bind, "before_cursor_execute", record)
+
+
+def main() -> int:
+    from fastapi.testclient import TestClient
+
+    tokens = {
+        "teacher": create_access_token(data={"sub": str(TEACHER_ID)}),
+        "student": create_access_token(data={"sub": str(STUDENT_ID)}),
+    }
+    failures = 0
+
+    with TestClient(app) as client:
+        for students, assignments in SIZES:
+            asyncio.run(seed(students, assignments))
+            for fast in (False, True):
+                fast_json.FAST_JSON = fast
+                print(f"{students} students x {assignments} assignments, FAST_JSON={str(fast).lower()}")
+                for path, role, budget in BUDGETS:
+                    with count_statements() as statements:
+                        response = client.get(path, headers={"Authorization": f"Bearer {tokens[role]}"})
+                    ok = response.status_code == 200 and len(statements) <= budget
+                    failures += not ok
+                    print(f"  {'ok  ' if ok else 'FAIL'} {role:<8} {path:<32} "
+                          f"{response.status_code} {len(statements)}/{budget}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
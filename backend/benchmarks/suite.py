@@ -0,0 +1,208 @@
+"""Нагрузочный набор API: задержки, пропускная способность и число SQL-запросов.
+
+Заполняет синтетический журнал (студенты x задания, доля оценок --density),
+прогоняет сценарии через ASGI-клиент в процессе с заданной конкурентностью
+и сохраняет результат в JSON, который можно сравнить с предыдущим прогоном.
+
+    python -m benchmarks.suite run --students 500 --assignments 20 --output baseline.json
+    python -m benchmarks.suite run --compare baseline.json --output current.json
+    python -m benchmarks.suite diff baseline.json current.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.seed import PASSWORD, TEACHER_ID, free_pairs, seed
+from benchmarks.statements import count_statements
+
+# Метрики, для которых рост - это ухудшение
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "statements_per_request", "errors")
+
+
+def percentile(latencies, fraction: float) -> float:
+    if not latencies:
+        return 0.0
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+def scenarios(args):
+    """(название, число запросов, фабрика запроса по номеру) для каждого сценария"""
+    pairs = iter(free_pairs(args.students, args.assignments, args.density))
+
+    def create_grade(client, headers, _):
+        pair = next(pairs, None)
+        if pair is None:
+            return None
+        assignment_id, student_id = pair
+        return client.post(
+            "/api/grades/",
+            json={"assignment_id": assignment_id, "student_id": student_id, "score": 50},
+            headers=headers
+        )
+
+    return {
+        "login": (args.login_requests, lambda client, headers, _: client.post(
+            "/api/auth/login", json={"email": "teacher@example.com", "password": PASSWORD}
+        )),
+        "list_grades": (args.requests, lambda client, headers, i: client.get(
+            f"/api/grades/?limit=100&after={(i * 100) % max(1, args.students * args.assignments)}",
+            headers=headers
+        )),
+        "list_grades_full": (max(1, args.requests // 10), lambda client, headers, _: client.get(
+            "/api/grades/", headers=headers
+        )),
+        "student_report": (args.requests, lambda client, headers, i: client.get(
+            f"/api/reports/student/{i % args.students + 2}", headers=headers
+        )),
+        "course_report": (max(1, args.requests // 10), lambda client, headers, _: client.get(
+            "/api/reports/course", headers=headers
+        )),
+        "create_grade": (args.requests, create_grade),
+    }
+
+
+async def _drive(client, headers, total: int, concurrency: int, make_request) -> dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            request = make_request(client, headers, i)
+            if request is None:
+                return
+            started = time.perf_counter()
+            response = await request
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+
+    with count_statements() as statements:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    done = len(latencies)
+    return {
+        "requests": done,
+        "errors": errors,
+        "throughput_rps": round(done / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statements_per_request": round(len(statements) / done, 2) if done else 0.0,
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    import sqlalchemy
+
+    from app.database import engine, read_engine
+    from app.main import app
+    from app.utils.security import create_access_token, get_password_hash
+
+    started = time.perf_counter()
+    await seed(args.students, args.assignments, args.density, password_hash=get_password_hash(PASSWORD))
+    seed_seconds = time.perf_counter() - started
+
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(TEACHER_ID)})}"}
+    selected = set(args.scenarios or [])
+    results = {}
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for name, (total, make_request) in scenarios(args).items():
+            if selected and name not in selected:
+                continue
+            results[name] = await _drive(client, headers, total, args.concurrency, make_request)
+            print(_format_row(name, results[name]), flush=True)
+
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "students": args.students,
+            "assignments": args.assignments,
+            "density": args.density,
+            "concurrency": args.concurrency,
+            "seed_seconds": round(seed_seconds, 3),
+        },
+        "scenarios": results,
+    }
+
+
+def _format_row(name: str, result: dict) -> str:
+    return (f"{name:<18} {result['requests']:>8} {result['errors']:>7} {result['throughput_rps']:>9.1f} "
+            f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+            f"{result['statements_per_request']:>7.2f}")
+
+
+def diff(old: dict, new: dict) -> None:
+    """Изменение метрик в процентах; '!' отмечает ухудшение больше чем на 10%"""
+    print(f"{'scenario':<18} {'metric':<24} {'old':>10} {'new':>10} {'change':>9}")
+    for name, current in new["scenarios"].items():
+        previous = old["scenarios"].get(name)
+        if previous is None:
+            print(f"{name:<18} (нет в базовом прогоне)")
+            continue
+        for metric, value in current.items():
+            before = previous.get(metric)
+            if before is None or metric == "requests":
+                continue
+            change = (value - before) / before * 100 if before else (0.0 if value == before else float("inf"))
+            worse = change > 10 if metric in LOWER_IS_BETTER else change < -10
+            print(f"{name:<18} {metric:<24} {before:>10} {value:>10} {change:>+8.1f}%{' !' if worse else ''}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="прогнать сценарии")
+    run_parser.add_argument("--students", type=int, default=200)
+    run_parser.add_argument("--assignments", type=int, default=10)
+    run_parser.add_argument("--density", type=float, default=0.8, help="доля пар студент/задание с оценкой")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий")
+    run_parser.add_argument("--login-requests", type=int, default=20)
+    run_parser.add_argument("--scenarios", nargs="+", help="только указанные сценарии")
+    run_parser.add_argument("--output", help="файл для JSON с результатами")
+    run_parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+
+    diff_parser = commands.add_parser("diff", help="сравнить два JSON-прогона")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        with open(args.old) as old, open(args.new) as new:
+            diff(json.load(old), json.load(new))
+        return 0
+
+    print(f"{'scenario':<18} {'requests':>8} {'errors':>7} {'req/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'stmts':>7}", flush=True)
+    result = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare) as f:
+            print()
+            diff(json.load(f), result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Проверка синхронизации по журналу изменений (GET /api/sync).
+
+Клиент получает полный снимок, затем данные меняются всеми обработчиками
+записи: создание, изменение и удаление оценки, массовый импорт с upsert,
+создание, изменение и удаление задания (с каскадом оценок). Снимок с
+примененными изменениями должен совпасть со свежими GET /api/grades/ и
+GET /api/assignments/ - у преподавателя и у студента, одним запросом и
+страницами по limit. После сжатия надгробий старый since получает полный
+снимок. Печатает размер ответа изменений против полных списков. Код
+возврата 1 при любом несоответствии.
+
+    python -m benchmarks.sync --students 1000 --assignments 20
+"""
+import argparse
+import asyncio
+import sys
+from datetime import timedelta
+
+import httpx
+from benchmarks.seed import FIRST_STUDENT_ID, TEACHER_ID, free_pairs, seed
+
+from app import changes
+from app.database import SessionLocal
+from app.main import app
+from app.utils.security import create_access_token
+
+DENSITY = 0.8
+
+
+def token(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user_id)})}"}
+
+
+async def pull(client, headers: dict, state: dict, limit: int = 1000) -> tuple:
+    """Применяет изменения к state до конца журнала; (число запросов, байт, был ли reset)"""
+    requests = size = 0
+    reset = False
+    while True:
+        since = "" if state["seq"] is None else f"&since={state['seq']}"
+        response = await client.get(f"/api/sync?limit={limit}{since}", headers=headers)
+        requests += 1
+        size += len(response.content)
+        delta = response.json()
+        if delta["reset"]:
+            reset = True
+            state.update(grades={}, assignments={})
+        for name in ("grades", "assignments"):
+            for item in delta[name]:
+                state[name][item["id"]] = item
+            for item_id in delta["deleted"][name]:
+                state[name].pop(item_id, None)
+        state["seq"] = delta["seq"]
+        if not delta["has_more"]:
+            return requests, size, reset
+
+
+async def full(client, headers: dict) -> tuple:
+    grades = await client.get("/api/grades/", headers=headers)
+    assignments = await client.get("/api/assignments/", headers=headers)
+    state = {
+        "grades": {item["id"]: item for item in grades.json()},
+        "assignments": {item["id"]: item for item in assignments.json()},
+    }
+    return state, len(grades.content) + len(assignments.content)
+
+
+def same(state: dict, expected: dict) -> bool:
+    return state["grades"] == expected["grades"] and state["assignments"] == expected["assignments"]
+
+
+async def run(students: int, assignments: int) -> int:
+    await seed(students, assignments, DENSITY)
+    failures = 0
+
+    def check(name: str, ok: bool, detail: str = "") -> None:
+        nonlocal failures
+        failures += not ok
+        print(f"  {'ok' if ok else 'FAIL':<4} {name} {detail}")
+
+    teacher = token(TEACHER_ID)
+    student_id = FIRST_STUDENT_ID
+    student = token(student_id)
+    pairs = free_pairs(students, assignments, DENSITY)
+    # Свободные пары студента student_id - чтобы изменения попали и в его журнал
+    own = [pair for pair in pairs if pair[1] == student_id]
+    other = [pair for pair in pairs if pair[1] != student_id]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        teacher_state = {"seq": None}
+        student_state = {"seq": None}
+        paged_state = {"seq": None}
+        await pull(client, teacher, teacher_state)
+        await pull(client, student, student_state)
+        await pull(client, teacher, paged_state)
+        check("снимок совпадает со списками", same(teacher_state, (await full(client, teacher))[0]))
+        stale_seq = teacher_state["seq"]
+
+        assignment_id, grade_student = own[0]
+        created = (await client.post("/api/grades/", json={
+            "assignment_id": assignment_id, "student_id": grade_student, "score": 10
+        }, headers=teacher)).json()
+        await client.put(f"/api/grades/{created['id']}", json={"score": 20}, headers=teacher)
+        await client.delete("/api/grades/1", headers=teacher)
+        bulk = [{"assignment_id": a, "student_id": s, "score": 30} for a, s in own[1:3] + other[:50]]
+        bulk.append({"assignment_id": 1, "student_id": student_id, "score": 40})
+        response = await client.post("/api/grades/bulk?upsert=true", json=bulk, headers=teacher)
+        check("массовый импорт", response.status_code == 200 and not response.json()["errors"], response.text[:200])
+
+        new_assignment = (await client.post("/api/assignments/", json={
+            "title": "Sync", "max_score": 10
+        }, headers=teacher)).json()
+        await client.put("/api/assignments/2", json={"title": "Renamed"}, headers=teacher)
+        response = await client.delete("/api/assignments/3", headers=teacher)
+        check("удаление задания", response.status_code == 204, str(response.status_code))
+
+        expected, full_size = await full(client, teacher)
+        requests, delta_size, reset = await pull(client, teacher, teacher_state)
+        check("изменения преподавателя", same(teacher_state, expected) and not reset)
+        check("новое задание и переименование", new_assignment["id"] in teacher_state["assignments"]
+              and teacher_state["assignments"][2]["title"] == "Renamed"
+              and all(g["assignment"]["title"] == "Renamed"
+                      for g in teacher_state["grades"].values() if g["assignment_id"] == 2))
+        paged_requests, _, _ = await pull(client, teacher, paged_state, limit=7)
+        check("изменения страницами по limit", same(paged_state, expected) and paged_requests > 1,
+              f"{paged_requests} запросов")
+        _, _, reset = await pull(client, student, student_state)
+        check("изменения студента", same(student_state, (await full(client, student))[0]) and not reset)
+        delta = (await client.get(f"/api/sync?since={stale_seq}", headers=student)).json()
+        check("студент не видит чужие оценки",
+              all(g["student_id"] == student_id for g in delta["grades"]), str(len(delta["grades"])))
+
+        response = (await client.get(f"/api/sync?since={teacher_state['seq']}", headers=teacher)).json()
+        check("без изменений - пустой ответ", not response["grades"] and not response["assignments"]
+              and response["seq"] == teacher_state["seq"] and not response["reset"])
+
+        async with SessionLocal() as db:
+            removed = await changes.compact(db, timedelta(0))
+            await db.commit()
+        check("сжатие надгробий", removed > 0, str(removed))
+        response = (await client.get(f"/api/sync?since={stale_seq + 1}", headers=teacher)).json()
+        check("since до сжатия - полный снимок", response["reset"])
+        requests_after, _, reset = await pull(client, teacher, teacher_state)
+        check("since после сжатия - изменения", not reset and same(teacher_state, expected))
+        response = (await client.get("/api/sync?since=999999999", headers=teacher)).json()
+        check("since из другой базы - полный снимок", response["reset"])
+
+    print(f"{students} students x {assignments} assignments: изменения {delta_size} bytes за {requests} запрос(а), "
+          f"полные списки {full_size} bytes")
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--assignments", type=int, default=10)
+    args = parser.parse_args()
+    return asyncio.run(run(args.students, args.assignments))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Окружение Alembic.
+
+Из приложения миграции запускаются через app.database.create_tables на уже
+открытом соединении (config.attributes["connection"]); из командной строки
+(`alembic upgrade head` в директории backend) - на собственном движке по DATABASE_URL.
+"""
+import asyncio
+
+from alembic import context
+
+from app import models  # noqa: F401 - регистрирует таблицы в Base.metadata
+from app.database import Base, DATABASE_URL, make_engine
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def do_run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite не умеет ALTER COLUMN - изменения таблиц идут через batch-режим
+        render_as_batch=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    engine = make_engine(DATABASE_URL)
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(do_run_migrations)
+    finally:
+        await engine.dispose()
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif config.attributes.get("connection") is not None:
+    do_run_migrations(config.attributes["connection"])
+else:
+    asyncio.run(run_async_migrations())
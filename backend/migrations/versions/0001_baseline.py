@@ -0,0 +1,89 @@
+"""Исходная схема: пользователи, задания, оценки и таблицы статистики
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # БД, созданные через create_all до миграций, могут содержать часть таблиц (например,
+    # только users, assignments и grades) - создаются лишь недостающие
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in tables:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("password_hash", sa.String(), nullable=False),
+            sa.Column("full_name", sa.String(), nullable=False),
+            sa.Column("role", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "assignments" not in tables:
+        op.create_table(
+            "assignments",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("max_score", sa.Float(), nullable=False),
+            sa.Column("deadline", sa.DateTime()),
+            sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_assignments_id", "assignments", ["id"])
+
+    if "grades" not in tables:
+        op.create_table(
+            "grades",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("assignment_id", sa.Integer(), sa.ForeignKey("assignments.id"), nullable=False),
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("score", sa.Float(), nullable=False),
+            sa.Column("comment", sa.Text()),
+            sa.Column("submitted_at", sa.DateTime()),
+            sa.Column("graded_at", sa.DateTime()),
+        )
+        op.create_index("ix_grades_id", "grades", ["id"])
+
+    if "student_stats" not in tables:
+        op.create_table(
+            "student_stats",
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("grade_count", sa.Integer(), nullable=False),
+            sa.Column("score_sum", sa.Float(), nullable=False),
+            sa.Column("score_min", sa.Float()),
+            sa.Column("score_max", sa.Float()),
+        )
+    if "assignment_stats" not in tables:
+        op.create_table(
+            "assignment_stats",
+            sa.Column("assignment_id", sa.Integer(), sa.ForeignKey("assignments.id"), primary_key=True),
+            sa.Column("grade_count", sa.Integer(), nullable=False),
+            sa.Column("score_sum", sa.Float(), nullable=False),
+            sa.Column("score_sq_sum", sa.Float(), nullable=False),
+        )
+    if "counters" not in tables:
+        op.create_table(
+            "counters",
+            sa.Column("name", sa.String(), primary_key=True),
+            sa.Column("value", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+
+def downgrade() -> None:
+    for table in ("counters", "assignment_stats", "student_stats", "grades", "assignments", "users"):
+        op.drop_table(table)
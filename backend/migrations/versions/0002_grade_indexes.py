@@ -0,0 +1,43 @@
+"""Индексы горячих путей оценок и уникальность (assignment_id, student_id)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT assignment_id, student_id, COUNT(*) FROM grades "
+        "GROUP BY assignment_id, student_id HAVING COUNT(*) > 1"
+    )).all()
+    if duplicates:
+        pairs = ", ".join(f"({a}, {s})" for a, s, _ in duplicates[:10])
+        raise RuntimeError(
+            f"Найдены повторяющиеся оценки (assignment_id, student_id): {pairs}. "
+            "Удалите лишние строки и выполните `python -m app.stats rebuild` перед миграцией."
+        )
+
+    # if_not_exists: таблицы могли быть созданы через create_all до появления миграций
+    op.create_index(
+        "ux_grades_assignment_student", "grades", ["assignment_id", "student_id"],
+        unique=True, if_not_exists=True
+    )
+    op.create_index("ix_grades_student_score", "grades", ["student_id", "score"], if_not_exists=True)
+    op.create_index("ix_grades_assignment_score", "grades", ["assignment_id", "score"], if_not_exists=True)
+    op.create_index("ix_users_role", "users", ["role"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_role", "users")
+    op.drop_index("ix_grades_assignment_score", "grades")
+    op.drop_index("ix_grades_student_score", "grades")
+    op.drop_index("ux_grades_assignment_student", "grades")
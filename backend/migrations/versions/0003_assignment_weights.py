@@ -0,0 +1,29 @@
+"""Вес и категория задания для взвешенной итоговой оценки
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Колонки могли быть созданы через create_all до этой миграции
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("assignments")}
+    if "weight" not in columns:
+        op.add_column("assignments", sa.Column("weight", sa.Float(), nullable=False, server_default="1"))
+    if "category" not in columns:
+        op.add_column("assignments", sa.Column("category", sa.String()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("assignments") as batch:
+        batch.drop_column("category")
+        batch.drop_column("weight")
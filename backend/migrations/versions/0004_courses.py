@@ -0,0 +1,63 @@
+"""Курсы, записи студентов на курсы и привязка заданий к курсу
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Таблицы и колонки могли быть созданы через create_all до этой миграции
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if "courses" not in tables:
+        op.create_table(
+            "courses",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("term", sa.String()),
+            sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_courses_id", "courses", ["id"])
+        op.create_index("ix_courses_term", "courses", ["term"])
+
+    if "enrollments" not in tables:
+        op.create_table(
+            "enrollments",
+            sa.Column("course_id", sa.Integer(), sa.ForeignKey("courses.id"), primary_key=True),
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("enrolled_at", sa.DateTime()),
+        )
+        op.create_index("ix_enrollments_student", "enrollments", ["student_id", "course_id"])
+
+    if "course_id" not in {column["name"] for column in inspector.get_columns("assignments")}:
+        if op.get_bind().dialect.name == "sqlite":
+            # ADD COLUMN ... REFERENCES без пересоздания таблицы (batch-режим): пересоздание
+            # assignments при включенных foreign_keys упирается в ссылки из grades
+            op.execute("ALTER TABLE assignments ADD COLUMN course_id INTEGER REFERENCES courses (id)")
+        else:
+            op.add_column("assignments", sa.Column("course_id", sa.Integer()))
+            op.create_foreign_key("fk_assignments_course_id", "assignments", "courses", ["course_id"], ["id"])
+        op.create_index("ix_assignments_course_id", "assignments", ["course_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_assignments_course_id", "assignments")
+    if op.get_bind().dialect.name == "sqlite":
+        # Колонку со ссылкой SQLite удалить не может; без курсов она остается пустой
+        op.execute("UPDATE assignments SET course_id = NULL")
+    else:
+        op.drop_constraint("fk_assignments_course_id", "assignments", type_="foreignkey")
+        op.drop_column("assignments", "course_id")
+    op.drop_table("enrollments")
+    op.drop_table("courses")
@@ -0,0 +1,36 @@
+"""Журнал изменений оценок и заданий для синхронизации клиентов
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Таблица могла быть создана через create_all до этой миграции
+    if "changes" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "changes",
+        sa.Column("seq", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("student_id", sa.Integer()),
+        sa.Column("deleted", sa.Boolean(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ux_changes_entity", "changes", ["entity", "entity_id"], unique=True)
+    op.create_index("ix_changes_student_seq", "changes", ["student_id", "seq"])
+
+
+def downgrade() -> None:
+    op.drop_table("changes")
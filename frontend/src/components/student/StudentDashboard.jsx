@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { gradesAPI, assignmentsAPI } from '../../services/api';
 import Loader from '../common/Loader';
 
@@ -11,11 +11,56 @@ const StudentDashboard = () => {
     total: 0,
     averageScore: 0,
   });
+  const assignmentsRef = useRef([]);
 
   useEffect(() => {
     loadData();
   }, []);
 
+  useEffect(() => {
+    // Обновления оценок приходят из потока событий вместо повторных запросов списка
+    const source = gradesAPI.stream();
+
+    const upsertGrade = (event) => {
+      const grade = JSON.parse(event.data);
+      const assignment = assignmentsRef.current.find((a) => a.id === grade.assignment_id);
+      if (!assignment) {
+        loadData();
+        return;
+      }
+      setGrades((current) => (
+        current.some((g) => g.id === grade.id)
+          ? current.map((g) => (g.id === grade.id ? { ...g, ...grade, assignment } : g))
+          : [...current, { ...grade, assignment }]
+      ));
+    };
+    const removeGrade = (event) => {
+      const { id } = JSON.parse(event.data);
+      setGrades((current) => current.filter((g) => g.id !== id));
+    };
+
+    source.addEventListener('grade.created', upsertGrade);
+    source.addEventListener('grade.updated', upsertGrade);
+    source.addEventListener('grade.deleted', removeGrade);
+    // Массовые изменения или пропущенные события - перезагрузить список целиком
+    source.addEventListener('grades.changed', () => loadData());
+    source.addEventListener('reset', () => loadData());
+
+    return () => source.close();
+  }, []);
+
+  useEffect(() => {
+    const avgScore = grades.length > 0
+      ? grades.reduce((sum, g) => sum + g.score, 0) / grades.length
+      : 0;
+
+    setStats({
+      completed: grades.length,
+      total: assignments.length,
+      averageScore: avgScore.toFixed(2),
+    });
+  }, [grades, assignments]);
+
   const loadData = async () => {
     try {
       const [gradesRes, assignmentsRes] = await Promise.all([
@@ -23,20 +68,9 @@ const StudentDashboard = () => {
         assignmentsAPI.getAll(),
       ]);
 
-      const myGrades = gradesRes.data;
-      const allAssignments = assignmentsRes.data;
-
-      const avgScore = myGrades.length > 0
-        ? myGrades.reduce((sum, g) => sum + g.score, 0) / myGrades.length
-        : 0;
-
-      setGrades(myGrades);
-      setAssignments(allAssignments);
-      setStats({
-        completed: myGrades.length,
-        total: allAssignments.length,
-        averageScore: avgScore.toFixed(2),
-      });
+      assignmentsRef.current = assignmentsRes.data;
+      setGrades(gradesRes.data);
+      setAssignments(assignmentsRes.data);
     } catch (error) {
       console.error('Ошибка загрузки данных:', error);
     } finally {
@@ -11,6 +11,8 @@ const AssignmentForm = () => {
     description: '',
     max_score: 100,
     deadline: '',
+    weight: 1,
+    category: '',
   });
 
   useEffect(() => {
@@ -31,8 +33,8 @@ const AssignmentForm = () => {
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
-      await assignmentsAPI.create(formData);
-      setFormData({ title: '', description: '', max_score: 100, deadline: '' });
+      await assignmentsAPI.create({ ...formData, category: formData.category || null });
+      setFormData({ title: '', description: '', max_score: 100, deadline: '', weight: 1, category: '' });
       setShowForm(false);
       loadAssignments();
       alert('✅ Задание создано успешно!');
@@ -110,6 +112,31 @@ const AssignmentForm = () => {
             </div>
           </div>
 
+          <div style={styles.row}>
+            <div style={styles.inputGroup}>
+              <label style={styles.label}>Вес в итоговой оценке</label>
+              <input
+                type="number"
+                value={formData.weight}
+                onChange={(e) => setFormData({ ...formData, weight: Number(e.target.value) })}
+                style={styles.input}
+                min="0"
+                step="0.1"
+              />
+            </div>
+
+            <div style={styles.inputGroup}>
+              <label style={styles.label}>Категория</label>
+              <input
+                type="text"
+                value={formData.category}
+                onChange={(e) => setFormData({ ...formData, category: e.target.value })}
+                style={styles.input}
+                placeholder="Например: quiz, lab, exam"
+              />
+            </div>
+          </div>
+
           <button type="submit" style={styles.submitButton}>
             Создать задание
           </button>
@@ -131,6 +158,10 @@ const AssignmentForm = () => {
               <p style={styles.description}>{assignment.description}</p>
               <div style={styles.cardFooter}>
                 <span style={styles.badge}>Макс. балл: {assignment.max_score}</span>
+                <span style={styles.badge}>Вес: {assignment.weight}</span>
+                {assignment.category && (
+                  <span style={styles.badge}>Категория: {assignment.category}</span>
+                )}
                 {assignment.deadline && (
                   <span style={styles.badge}>
                     Срок: {new Date(assignment.deadline).toLocaleDateString('ru-RU')}
@@ -19,19 +19,18 @@ const ReportGenerator = () => {
     }
   };
 
-  const exportToCSV = () => {
-    if (!report) return;
-
-    let csv = 'Студент,Всего заданий,Выполнено,Средний балл\n';
-    report.student_reports.forEach(sr => {
-      csv += `${sr.student.full_name},${sr.total_assignments},${sr.completed_assignments},${sr.average_score}\n`;
-    });
-
-    const blob = new Blob([csv], { type: 'text/csv;charset=utf-8;' });
-    const link = document.createElement('a');
-    link.href = URL.createObjectURL(blob);
-    link.download = `report_${new Date().toISOString().split('T')[0]}.csv`;
-    link.click();
+  const exportReport = async (format, layout) => {
+    try {
+      const response = await reportsAPI.exportCourseReport({ format, layout });
+      const link = document.createElement('a');
+      link.href = URL.createObjectURL(response.data);
+      link.download = `report_${layout}_${new Date().toISOString().split('T')[0]}.${format}`;
+      link.click();
+      URL.revokeObjectURL(link.href);
+    } catch (error) {
+      console.error('Ошибка экспорта отчета:', error);
+      alert('❌ Ошибка экспорта отчета');
+    }
   };
 
   return (
@@ -42,11 +41,12 @@ const ReportGenerator = () => {
           <button onClick={loadReport} style={styles.generateButton} disabled={loading}>
             {loading ? 'Загрузка...' : '🔄 Сгенерировать отчёт'}
           </button>
-          {report && (
-            <button onClick={exportToCSV} style={styles.exportButton}>
-              📥 Экспорт CSV
-            </button>
-          )}
+          <button onClick={() => exportReport('csv', 'summary')} style={styles.exportButton}>
+            📥 Экспорт CSV
+          </button>
+          <button onClick={() => exportReport('xlsx', 'matrix')} style={styles.exportButton}>
+            📥 Ведомость XLSX
+          </button>
         </div>
       </div>
 
@@ -69,6 +69,12 @@ const ReportGenerator = () => {
                 <div style={styles.summaryValue}>{report.average_score}</div>
                 <div style={styles.summaryLabel}>Средний балл</div>
               </div>
+              {report.average_percentage != null && (
+                <div style={styles.summaryCard}>
+                  <div style={styles.summaryValue}>{report.average_percentage}%</div>
+                  <div style={styles.summaryLabel}>Средний итог с весами</div>
+                </div>
+              )}
             </div>
           </div>
 
@@ -85,6 +91,11 @@ const ReportGenerator = () => {
                     <span style={{ ...styles.statBadge, background: '#43e97b' }}>
                       Средний балл: {sr.average_score}
                     </span>
+                    {sr.percentage != null && (
+                      <span style={{ ...styles.statBadge, background: '#f093fb' }}>
+                        Итог: {sr.percentage}% ({sr.letter_grade})
+                      </span>
+                    )}
                   </div>
                 </div>
                 
@@ -46,8 +46,19 @@ export const usersAPI = {
   getById: (id) => api.get(`/users/${id}`),
 };
 
+export const coursesAPI = {
+  getAll: (term) => api.get('/courses/', { params: { term } }),
+  getById: (id) => api.get(`/courses/${id}`),
+  create: (data) => api.post('/courses/', data),
+  update: (id, data) => api.put(`/courses/${id}`, data),
+  delete: (id) => api.delete(`/courses/${id}`),
+  getStudents: (id) => api.get(`/courses/${id}/students`),
+  enroll: (id, studentIds) => api.post(`/courses/${id}/enrollments`, { student_ids: studentIds }),
+  unenroll: (id, studentId) => api.delete(`/courses/${id}/enrollments/${studentId}`),
+};
+
 export const assignmentsAPI = {
-  getAll: () => api.get('/assignments/'),
+  getAll: (courseId) => api.get('/assignments/', { params: { course_id: courseId } }),
   getById: (id) => api.get(`/assignments/${id}`),
   create: (data) => api.post('/assignments/', data),
   update: (id, data) => api.put(`/assignments/${id}`, data),
@@ -58,15 +69,35 @@ export const assignmentsAPI = {
 export const gradesAPI = {
   getAll: (params) => api.get('/grades/', { params }),
   getById: (id) => api.get(`/grades/${id}`),
+  getMatrix: (encoding = 'json', courseId) => api.get('/grades/matrix', { params: { encoding, course_id: courseId } }),
   create: (data) => api.post('/grades/', data),
+  bulkCreate: (rows, params) => api.post('/grades/bulk', rows, { params }),
   update: (id, data) => api.put(`/grades/${id}`, data),
   delete: (id) => api.delete(`/grades/${id}`),
+  // EventSource не передает заголовки, поэтому токен идет в query-параметре
+  stream: () => new EventSource(
+    `${API_URL}/api/grades/stream?token=${encodeURIComponent(localStorage.getItem('token') || '')}`
+  ),
 };
 
 
 export const reportsAPI = {
-  getStudentReport: (studentId) => api.get(`/reports/student/${studentId}`),
-  getCourseReport: () => api.get('/reports/course'),
+  getStudentReport: (studentId, courseId) => api.get(`/reports/student/${studentId}`, { params: { course_id: courseId } }),
+  getCourseReport: (courseId) => api.get('/reports/course', { params: { course_id: courseId } }),
+  exportCourseReport: (params, courseId) => api.get('/reports/course/export', {
+    params: { ...params, course_id: courseId },
+    responseType: 'blob',
+  }),
+  createJob: (data) => api.post('/reports/jobs', data),
+  getJob: (id) => api.get(`/reports/jobs/${id}`),
+  getJobResult: (id, responseType = 'json') => api.get(`/reports/jobs/${id}/result`, { responseType }),
+  cancelJob: (id) => api.delete(`/reports/jobs/${id}`),
+};
+
+
+export const syncAPI = {
+  // Без since - полный снимок; дальше передается seq из предыдущего ответа
+  changes: (since, limit) => api.get('/sync', { params: { since, limit } }),
 };
 
 export default api;
\ No newline at end of file